@@ -0,0 +1,54 @@
+import statistics
+import sys
+import time
+
+from benchmarks.processes import free_port, spawn_service, stop, wait_until_serving
+
+SERVICES = (
+	('rollercoaster',),
+	('rollercoaster', '--aio'),
+	('wagon',),
+	('wagon', '--aio'),
+	('wagon', '--wagons', '100'),
+	('passenger',),
+	('passenger', '--aio'),
+	('passenger', '--passengers', '1000'),
+)
+
+
+def time_to_serving(service_type: str, coordinator: int, *args: str) -> float:
+	# From spawning the process to its server accepting a connection
+	port = free_port()
+	start = time.perf_counter()
+	process = spawn_service(service_type, port, 'localhost', str(coordinator), *args)
+	try:
+		return time.perf_counter() - start + wait_until_serving(port)
+	finally:
+		stop([process])
+
+
+def main() -> None:
+	runs = int(sys.argv[1]) if len(sys.argv) >= 2 else 10
+	# Wagons and passengers register with this one as they start, as they
+	# would in a deployment; it is not part of what is measured
+	coordinator = free_port()
+	processes = [spawn_service('rollercoaster', coordinator)]
+	try:
+		wait_until_serving(coordinator)
+		print(f'time to serving over {runs} runs, ms')
+		print(f'  {"service":<36} {"median":>8} {"min":>8}')
+		for service_type, *args in SERVICES:
+			times = [
+				time_to_serving(service_type, coordinator, *args) for _ in range(runs)
+			]
+			name = ' '.join((service_type, *args))
+			print(
+				f'  {name:<36} {statistics.median(times) * 1000:8.1f}'
+				f' {min(times) * 1000:8.1f}'
+			)
+	finally:
+		stop(processes)
+
+
+if __name__ == '__main__':
+	main()
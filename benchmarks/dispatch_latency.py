@@ -0,0 +1,93 @@
+import contextlib
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from proto import rollercoaster_pb2
+from services.rollercoaster_service import Ride, RollercoasterService
+
+
+class BenchRollercoasterService(RollercoasterService):
+	def __init__(self) -> None:
+		super().__init__('localhost', 0)
+		self.dispatched = threading.Semaphore(0)
+		self.dispatch_times: list[float] = []
+		self.checks = 0
+
+	def _can_dispatch(self) -> bool:
+		self.checks += 1
+		return super()._can_dispatch()
+
+	def _coordinate_ride(self, ride: Ride) -> None:
+		self.dispatch_times.append(time.perf_counter())
+		self.dispatched.release()
+
+
+class PollingRollercoasterService(BenchRollercoasterService):
+	# The original coordinator loop, kept as the baseline to compare against
+	def _ride_coordinator(self) -> None:
+		while self._running:
+			with self._lock:
+				if self._can_dispatch():
+					self._coordinate_ride(self._take_ride())
+			time.sleep(1)
+
+
+def registration(port: int) -> rollercoaster_pb2.RegistrationRequest:
+	return rollercoaster_pb2.RegistrationRequest(host='localhost', port=port)
+
+
+def run(
+	service: BenchRollercoasterService, rides: int, seed: int
+) -> tuple[list[float], int]:
+	rng = random.Random(seed)
+	service._start_ride_coordinator()
+	latencies: list[float] = []
+	port = 1
+	for _ in range(rides):
+		time.sleep(rng.uniform(0.0, 0.3))
+		service.register_wagon(registration(port), None)
+		for _ in range(service.wagon_cap):
+			port += 1
+			service.register_passenger(registration(port), None)
+		# The last registration completes the ride
+		ready = time.perf_counter()
+		service.dispatched.acquire()
+		latencies.append(service.dispatch_times[-1] - ready)
+		port += 1
+
+	service.checks = 0
+	time.sleep(2)
+	idle_checks = service.checks
+	service.stop_server()
+	return latencies, idle_checks
+
+
+def report(name: str, latencies: list[float], idle_checks: int) -> None:
+	ms = sorted(x * 1000 for x in latencies)
+	p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+	print(
+		f'{name:<8} mean {statistics.fmean(ms):8.2f} ms  '
+		f'p50 {statistics.median(ms):8.2f} ms  p99 {p99:8.2f} ms  '
+		f'idle wakeups/2s {idle_checks}'
+	)
+
+
+def main() -> None:
+	rides = int(sys.argv[1]) if len(sys.argv) >= 2 else 20
+	print(f'time-to-dispatch over {rides} rides')
+	for name, service in (
+		('polling', PollingRollercoasterService()),
+		('event', BenchRollercoasterService()),
+	):
+		# Keep the services' per-registration prints out of the report
+		with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+			latencies, idle_checks = run(service, rides, seed=0)
+		report(name, latencies, idle_checks)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import urllib.request
+from pathlib import Path
+
+from benchmarks.processes import free_port, spawn_service, stop, wait_until_serving
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(
+		description='Drive a coordinator, passengers and wagons on localhost'
+	)
+	parser.add_argument('--passengers', type=int, default=8)
+	parser.add_argument('--wagons', type=int, default=2)
+	parser.add_argument('--capacity', type=int, default=2)
+	parser.add_argument('--duration', type=float, default=30.0)
+	parser.add_argument(
+		'--warmup', type=float, default=2.0, help='seconds before measuring starts'
+	)
+	parser.add_argument('--ride-duration', type=float, default=1.0)
+	parser.add_argument('--retry-delay', type=float, nargs=2, default=(0.1, 0.5))
+	parser.add_argument('--aio', action='store_true')
+	parser.add_argument('--subscribe', action='store_true')
+	parser.add_argument('--output', type=Path, help='also write the results here')
+	return parser.parse_args()
+
+
+def scrape(port: int) -> dict[str, float]:
+	with urllib.request.urlopen(f'http://localhost:{port}/metrics', timeout=5) as r:
+		lines = r.read().decode().splitlines()
+	samples = {}
+	for line in lines:
+		if line and not line.startswith('#'):
+			name, value = line.rsplit(' ', 1)
+			samples[name] = float(value)
+	return samples
+
+
+def histogram(
+	before: dict[str, float], after: dict[str, float], name: str
+) -> list[tuple[float, float]]:
+	# (upper bound, cumulative count) for what was observed between scrapes
+	prefix = f'{name}_bucket{{le="'
+	buckets = []
+	for key, value in after.items():
+		if key.startswith(prefix):
+			bound = float(key[len(prefix) : -2])
+			buckets.append((bound, value - before.get(key, 0.0)))
+	return sorted(buckets)
+
+
+def quantile(buckets: list[tuple[float, float]], q: float) -> float | None:
+	# Interpolates linearly inside the bucket, the way Prometheus does
+	if not buckets or buckets[-1][1] == 0:
+		return None
+	rank = q * buckets[-1][1]
+	lower, below = 0.0, 0.0
+	for bound, count in buckets:
+		if count >= rank:
+			if bound == float('inf'):
+				return lower
+			if count == below:
+				return bound
+			return lower + (bound - lower) * (rank - below) / (count - below)
+		lower, below = bound, count
+	return lower
+
+
+def process_usage(pid: int) -> tuple[float, int] | None:
+	# CPU seconds and resident bytes, from /proc
+	try:
+		stat = Path(f'/proc/{pid}/stat').read_text()
+		status = Path(f'/proc/{pid}/status').read_text()
+	except OSError:
+		return None
+	fields = stat.rsplit(')', 1)[1].split()
+	cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+	rss = 0
+	for line in status.splitlines():
+		if line.startswith('VmRSS:'):
+			rss = int(line.split()[1]) * 1024
+	return cpu, rss
+
+
+def main() -> None:
+	args = parse_args()
+	common = ['--aio'] if args.aio else []
+	if args.subscribe:
+		common.append('--subscribe')
+	retry = ['--retry-delay', *map(str, args.retry_delay)]
+
+	port, metrics_port = free_port(), free_port()
+	roles: list[tuple[str, subprocess.Popen]] = []
+	try:
+		roles.append(
+			(
+				'rollercoaster',
+				spawn_service(
+					'rollercoaster',
+					port,
+					'--metrics-port',
+					str(metrics_port),
+					*common,
+				),
+			)
+		)
+		wait_until_serving(port)
+		target = ['localhost', str(port)]
+		for _ in range(args.wagons):
+			wagon = spawn_service(
+				'wagon',
+				free_port(),
+				*target,
+				'--capacity',
+				str(args.capacity),
+				'--ride-duration',
+				str(args.ride_duration),
+				*retry,
+				*common,
+			)
+			roles.append(('wagon', wagon))
+		for _ in range(args.passengers):
+			passenger = spawn_service(
+				'passenger', free_port(), *target, *retry, *common
+			)
+			roles.append(('passenger', passenger))
+
+		time.sleep(args.warmup)
+		before = scrape(metrics_port)
+		usage_before = {p.pid: process_usage(p.pid) for _, p in roles}
+		start = time.perf_counter()
+		time.sleep(args.duration)
+		after = scrape(metrics_port)
+		elapsed = time.perf_counter() - start
+		usage_after = {p.pid: process_usage(p.pid) for _, p in roles}
+	finally:
+		stop([p for _, p in roles])
+
+	processes = []
+	for role, process in roles:
+		first, last = usage_before[process.pid], usage_after[process.pid]
+		processes.append(
+			{
+				'role': role,
+				'pid': process.pid,
+				'cpu_percent': None
+				if first is None or last is None
+				else round(100 * (last[0] - first[0]) / elapsed, 2),
+				'rss_bytes': None if last is None else last[1],
+			}
+		)
+
+	rides = after['rollercoaster_rides_completed_total'] - before.get(
+		'rollercoaster_rides_completed_total', 0.0
+	)
+	wait = histogram(before, after, 'rollercoaster_passenger_wait_seconds')
+	boarding = histogram(before, after, 'rollercoaster_boarding_seconds')
+	results = {
+		'config': {
+			key: list(value) if isinstance(value, tuple) else value
+			for key, value in vars(args).items()
+			if key != 'output'
+		},
+		'python': platform.python_version(),
+		'elapsed_seconds': round(elapsed, 3),
+		'rides': int(rides),
+		'rides_per_second': round(rides / elapsed, 3),
+		'passenger_wait_seconds': {
+			'p50': quantile(wait, 0.5),
+			'p99': quantile(wait, 0.99),
+		},
+		'boarding_seconds': {
+			'p50': quantile(boarding, 0.5),
+			'p99': quantile(boarding, 0.99),
+		},
+		'failed_rides': int(
+			after['rollercoaster_rides_failed_total']
+			- before.get('rollercoaster_rides_failed_total', 0.0)
+		),
+		'processes': processes,
+	}
+	report = json.dumps(results, indent=2)
+	print(report)
+	if args.output:
+		args.output.write_text(report + '\n')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,55 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import IO
+
+import grpc
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(('localhost', 0))
+		return sock.getsockname()[1]
+
+
+def spawn_service(
+	service_type: str, port: int, *args: str, stdout: IO | int = subprocess.DEVNULL
+) -> subprocess.Popen:
+	return subprocess.Popen(
+		[sys.executable, '-u', 'main.py', service_type, str(port), *args],
+		cwd=ROOT,
+		stdout=stdout,
+		stderr=subprocess.STDOUT,
+		env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+	)
+
+
+def wait_until_serving(port: int, timeout: float = 10.0) -> float:
+	# Returns how long it took for the port to accept a gRPC connection
+	start = time.perf_counter()
+	# Retry connecting every few milliseconds rather than backing off to a
+	# second, so the time is not rounded up to the next retry
+	options = [
+		('grpc.initial_reconnect_backoff_ms', 10),
+		('grpc.min_reconnect_backoff_ms', 10),
+		('grpc.max_reconnect_backoff_ms', 50),
+	]
+	with grpc.insecure_channel(f'localhost:{port}', options=options) as channel:
+		grpc.channel_ready_future(channel).result(timeout=timeout)
+		# Closing the channel can take a while and is not part of it
+		return time.perf_counter() - start
+
+
+def stop(processes: list[subprocess.Popen]) -> None:
+	for process in processes:
+		process.terminate()
+	for process in processes:
+		try:
+			process.wait(timeout=5)
+		except subprocess.TimeoutExpired:
+			process.kill()
@@ -0,0 +1,63 @@
+import sys
+import time
+
+import grpc
+
+from benchmarks.processes import free_port, spawn_service, stop, wait_until_serving
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+
+BATCH_SIZE = 500
+
+
+def registrations(count: int) -> list[rollercoaster_pb2.RegistrationRequest]:
+	# Distinct endpoints, so every request creates a new entry
+	return [
+		rollercoaster_pb2.RegistrationRequest(host='bench', port=port)
+		for port in range(1, count + 1)
+	]
+
+
+def unary(stub: rollercoaster_pb2_grpc.rollercoasterStub, kind: str, count: int):
+	register = getattr(stub, f'register_{kind}')
+	for request in registrations(count):
+		register(request)
+
+
+def bulk(stub: rollercoaster_pb2_grpc.rollercoasterStub, kind: str, count: int):
+	register = getattr(stub, f'register_{kind}s_bulk')
+	requests = registrations(count)
+	for start in range(0, count, BATCH_SIZE):
+		batch = rollercoaster_pb2.RegistrationBatch(
+			registrations=requests[start : start + BATCH_SIZE]
+		)
+		register(batch)
+
+
+def run(mode, kind: str, count: int, coordinator_args: list[str]) -> float:
+	# A fresh coordinator per run, registering only one kind so no ride is
+	# ever dispatched to the made-up endpoints
+	port = free_port()
+	coordinator = spawn_service('rollercoaster', port, *coordinator_args)
+	try:
+		wait_until_serving(port)
+		with grpc.insecure_channel(f'localhost:{port}') as channel:
+			stub = rollercoaster_pb2_grpc.rollercoasterStub(channel)
+			start = time.perf_counter()
+			mode(stub, kind, count)
+			return count / (time.perf_counter() - start)
+	finally:
+		stop([coordinator])
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) >= 2 else 5000
+	coordinator_args = sys.argv[2:]
+	print(f'{count} registrations, batches of {BATCH_SIZE}, registrations/s')
+	for kind in ('passenger', 'wagon'):
+		for mode in (unary, bulk):
+			rate = run(mode, kind, count, coordinator_args)
+			print(f'  {kind:<9} {mode.__name__:<5} {rate:10.0f}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,79 @@
+import contextlib
+import gc
+import io
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+
+from proto import rollercoaster_pb2
+from services.registry import Registry
+from services.rollercoaster_service import RollercoasterService
+
+HOSTS = 16
+
+
+def endpoints(count: int) -> Iterator[tuple[str, int, int]]:
+	# A handful of hosts with many ports each, and slots once ports run out,
+	# as passenger hosts would register. Every host is a new string, like
+	# one that came off the wire.
+	for i in range(count):
+		host = i % HOSTS
+		yield f'10.0.{host // 4}.{host % 4}', 40000 + i // HOSTS % 20000, i // 320_000
+
+
+def measure(fill: Callable[[], object], count: int) -> tuple[float, float]:
+	# Bytes allocated per entry by what fill() keeps alive, and how long
+	# filling took
+	gc.collect()
+	tracemalloc.start()
+	start = time.perf_counter()
+	kept = fill()
+	elapsed = time.perf_counter() - start
+	gc.collect()
+	allocated = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del kept
+	return allocated / count, elapsed
+
+
+def tuples(count: int) -> object:
+	# The layout Registry had before: a tuple per entry both ways
+	endpoints_by_id = {}
+	ids = {}
+	for entry_id, (host, port, slot) in enumerate(endpoints(count)):
+		ids[host, port, slot] = entry_id
+		endpoints_by_id[entry_id] = (host, port)
+	return endpoints_by_id, ids
+
+
+def registry(count: int) -> object:
+	registry = Registry()
+	for host, port, slot in endpoints(count):
+		registry.register(host, port, slot)
+	return registry
+
+
+def coordinator(count: int) -> object:
+	# Everything a coordinator keeps for a waiting passenger: its entry,
+	# lease and place in the queue
+	service = RollercoasterService('bench', 0)
+	service.max_waiting_passengers = count
+	with contextlib.redirect_stdout(io.StringIO()), service._lock:
+		for host, port, slot in endpoints(count):
+			service._register_passenger(
+				rollercoaster_pb2.RegistrationRequest(host=host, port=port, slot=slot)
+			)
+	return service
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) >= 2 else 1_000_000
+	print(f'{count} passengers on {HOSTS} hosts, bytes per passenger')
+	for fill in (tuples, registry, coordinator):
+		per_entry, elapsed = measure(lambda fill=fill: fill(count), count)
+		print(f'  {fill.__name__:<12} {per_entry:8.1f}   ({elapsed:.2f} s)')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,76 @@
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import grpc
+
+from benchmarks.processes import free_port, spawn_service, stop, wait_until_serving
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services.sharding import HashRing
+
+SHARD_COUNTS = (1, 2, 4, 8)
+CLIENTS = 8
+
+
+def register(shards: list[tuple[str, int]], ports: range) -> int:
+	# One client process: routes each of its endpoints through the ring, as
+	# a passenger would in register_with_rollercoaster
+	ring = HashRing(shards)
+	channels = {
+		shard: grpc.insecure_channel(f'{shard[0]}:{shard[1]}') for shard in shards
+	}
+	stubs = {
+		shard: rollercoaster_pb2_grpc.rollercoasterStub(channel)
+		for shard, channel in channels.items()
+	}
+	for port in ports:
+		stub = stubs[ring.shard_for('bench', port)]
+		stub.register_passenger(
+			rollercoaster_pb2.RegistrationRequest(host='bench', port=port)
+		)
+	for channel in channels.values():
+		channel.close()
+	return len(ports)
+
+
+def run(
+	shard_count: int, count: int, clients: ProcessPoolExecutor
+) -> tuple[float, float]:
+	# Returns registrations/s and the largest shard's share of the endpoints.
+	# Only passengers register, so no ride is dispatched to made-up endpoints.
+	ports = [free_port() for _ in range(shard_count)]
+	coordinators = [spawn_service('rollercoaster', port) for port in ports]
+	try:
+		for port in ports:
+			wait_until_serving(port)
+		shards = [('localhost', port) for port in ports]
+		ring = HashRing(shards)
+		owners = Counter(ring.shard_for('bench', port) for port in range(1, count + 1))
+		step = count // CLIENTS
+		slices = [range(1 + i * step, 1 + (i + 1) * step) for i in range(CLIENTS)]
+		start = time.perf_counter()
+		done = sum(clients.map(register, [shards] * CLIENTS, slices))
+		rate = done / (time.perf_counter() - start)
+		return rate, max(owners.values()) / count
+	finally:
+		stop(coordinators)
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) >= 2 else 20000
+	print(f'{count} passenger registrations from {CLIENTS} client processes')
+	print(f'{"shards":>6} {"reg/s":>10} {"speedup":>8} {"largest shard":>14}')
+	with ProcessPoolExecutor(CLIENTS) as clients:
+		baseline = None
+		for shard_count in SHARD_COUNTS:
+			rate, largest = run(shard_count, count, clients)
+			baseline = baseline or rate
+			print(
+				f'{shard_count:>6} {rate:>10.0f} {rate / baseline:>7.2f}x '
+				f'{largest:>13.1%}'
+			)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,79 @@
+import random
+import sys
+import time
+from collections.abc import Callable
+
+from services.waiting_queue import WaitingQueue
+
+OPS = 1000
+RIDE_SIZE = 4
+
+
+class ListQueue:
+	# The plain list the coordinator used before WaitingQueue
+	def __init__(self) -> None:
+		self._items: list[int] = []
+
+	def push(self, item: int) -> bool:
+		if item in self._items:
+			return False
+		self._items.append(item)
+		return True
+
+	def push_front(self, items: list[int]) -> None:
+		self._items[:0] = items
+
+	def pop_front(self, count: int) -> list[int]:
+		items = self._items[:count]
+		for item in items:
+			self._items.remove(item)
+		return items
+
+	def discard(self, item: int) -> None:
+		if item in self._items:
+			self._items.remove(item)
+
+	def __contains__(self, item: object) -> bool:
+		return item in self._items
+
+
+def per_op(fn: Callable[[], object], ops: int) -> float:
+	start = time.perf_counter()
+	fn()
+	return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench(queue_type: type, size: int, seed: int) -> dict[str, float]:
+	rng = random.Random(seed)
+	queue = queue_type()
+	queue.push_front(list(range(size)))
+
+	probes = [rng.randrange(size) for _ in range(OPS)]
+	return {
+		'contains': per_op(lambda: [p in queue for p in probes], OPS),
+		'push dup': per_op(lambda: [queue.push(p) for p in probes], OPS),
+		'discard': per_op(lambda: [queue.discard(p) for p in probes], OPS),
+		'pop ride': per_op(
+			lambda: [queue.pop_front(RIDE_SIZE) for _ in range(OPS)], OPS
+		),
+		'push new': per_op(
+			lambda: [queue.push(size + i) for i in range(OPS)],
+			OPS,
+		),
+	}
+
+
+def main() -> None:
+	sizes = [int(arg) for arg in sys.argv[1:]] or [10**5, 10**6]
+	for size in sizes:
+		print(f'{size} waiting passengers, {OPS} ops, us/op')
+		for name, queue_type in (('list', ListQueue), ('queue', WaitingQueue)):
+			results = bench(queue_type, size, seed=0)
+			print(
+				f'  {name:<6}'
+				+ ''.join(f'  {op} {us:10.3f}' for op, us in results.items())
+			)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,88 @@
+import sys
+import time
+from collections import deque
+
+import grpc
+
+from benchmarks.processes import free_port, spawn_service, stop, wait_until_serving
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+
+WORKER_COUNTS = (1, 2, 4, 8, 16, 32)
+STREAMS = 8
+IN_FLIGHT = 32
+TIMEOUT = 2.0
+
+
+def register(stub: rollercoaster_pb2_grpc.rollercoasterStub, count: int) -> int:
+	# Keeps IN_FLIGHT registrations outstanding and returns how many succeeded.
+	# A starved server shows up as calls that time out, after which there is
+	# no point in sending the rest.
+	pending: deque[grpc.Future] = deque()
+	completed = 0
+	for port in range(1, count + 1):
+		if len(pending) >= IN_FLIGHT:
+			if not _succeeded(pending.popleft()):
+				break
+			completed += 1
+		request = rollercoaster_pb2.RegistrationRequest(host='bench', port=port)
+		pending.append(stub.register_passenger.future(request, timeout=TIMEOUT))
+	completed += sum(_succeeded(future) for future in pending)
+	return completed
+
+
+def _succeeded(future: grpc.Future) -> bool:
+	try:
+		future.result()
+	except grpc.RpcError:
+		return False
+	return True
+
+
+def run(workers: int, streams: int, count: int) -> float:
+	# Each open subscription holds a sync server thread for as long as it
+	# lasts, like a wagon or passenger started with --subscribe. They get
+	# threads on top of --max-workers, so registrations should not slow down.
+	port = free_port()
+	coordinator = spawn_service(
+		'rollercoaster',
+		port,
+		'--max-workers',
+		str(workers),
+		'--max-waiting',
+		str(count),
+	)
+	try:
+		wait_until_serving(port)
+		with grpc.insecure_channel(f'localhost:{port}') as channel:
+			stub = rollercoaster_pb2_grpc.rollercoasterStub(channel)
+			subscriptions = [
+				stub.subscribe(
+					rollercoaster_pb2.RegistrationRequest(host='sub', port=i)
+				)
+				for i in range(streams)
+			]
+			start = time.perf_counter()
+			completed = register(stub, count)
+			rate = completed / (time.perf_counter() - start)
+			for subscription in subscriptions:
+				subscription.cancel()
+			return rate
+	finally:
+		stop([coordinator])
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) >= 2 else 3000
+	print(
+		f'{count} passenger registrations, {IN_FLIGHT} in flight, '
+		f'registrations/s by --max-workers'
+	)
+	print(f'  {"workers":>7} {"idle":>10} {f"{STREAMS} streams":>11}')
+	for workers in WORKER_COUNTS:
+		idle = run(workers, 0, count)
+		busy = run(workers, STREAMS, count)
+		print(f'  {workers:>7} {idle:10.0f} {busy:11.0f}')
+
+
+if __name__ == '__main__':
+	main()
@@ -1,10 +1,12 @@
+import argparse
+import contextlib
 import sys
 
-import socket
+from services import config
+from services.base import BaseService
 
-from services.passenger_service import PassengerService
-from services.rollercoaster_service import RollercoasterService
-from services.wagon_service import WagonService
+# Services are imported where they are created: a process runs only one, and
+# short-lived wagons and passengers should not pay for loading the others
 
 
 def create_service(
@@ -13,46 +15,185 @@ def create_service(
 	host: str = '0.0.0.0',
 	rollercoaster_host: str = 'localhost',
 	rollercoaster_port: int = 50051,
-) -> RollercoasterService | WagonService | PassengerService:
-	if service_type == 'rollercoaster':
+	aio: bool = False,
+	subscribe: bool = False,
+	capacity: int = 0,
+	passengers: int = 1,
+	wagons: int = 1,
+) -> BaseService:
+	consumer = (host, port, rollercoaster_host, rollercoaster_port, subscribe)
+	if service_type == 'rollercoaster' and aio:
+		from services.aio.rollercoaster_service import AioRollercoasterService
+
+		return AioRollercoasterService(host, port)
+	elif service_type == 'rollercoaster':
+		from services.rollercoaster_service import RollercoasterService
+
 		return RollercoasterService(host, port)
+	elif service_type == 'wagon' and wagons > 1:
+		from services.wagon_fleet_service import WagonFleetService
+
+		return WagonFleetService(*consumer, capacity, wagons)
+	elif service_type == 'wagon' and aio:
+		from services.aio.wagon_service import AioWagonService
+
+		return AioWagonService(*consumer, capacity)
 	elif service_type == 'wagon':
-		return WagonService(host, port, rollercoaster_host, rollercoaster_port)
+		from services.wagon_service import WagonService
+
+		return WagonService(*consumer, capacity)
+	elif service_type == 'passenger' and passengers > 1:
+		from services.passenger_host_service import PassengerHostService
+
+		return PassengerHostService(*consumer, passengers)
+	elif service_type == 'passenger' and aio:
+		from services.aio.passenger_service import AioPassengerService
+
+		return AioPassengerService(*consumer)
 	elif service_type == 'passenger':
-		return PassengerService(host, port, rollercoaster_host, rollercoaster_port)
+		from services.passenger_service import PassengerService
+
+		return PassengerService(*consumer)
 	else:
 		raise ValueError(f'Unknown service type: {service_type}')
 
 
-def main() -> None:
-	if len(sys.argv) < 3:
-		print(
-			'Usage: python main.py <service_type> <port> [rollercoaster_host] [rollercoaster_port]'
-		)
-		print('service_type: rollercoaster, wagon, or passenger')
-		sys.exit(1)
+def parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('service_type', choices=['rollercoaster', 'wagon', 'passenger'])
+	parser.add_argument('port', type=int)
+	parser.add_argument('rollercoaster_host', nargs='?', default='localhost')
+	parser.add_argument('rollercoaster_port', nargs='?', type=int, default=50051)
+	parser.add_argument(
+		'--aio', action='store_true', help='serve and call out using grpc.aio'
+	)
+	parser.add_argument(
+		'--subscribe',
+		action='store_true',
+		help='wagon/passenger: receive events over a stream instead of hosting a server',
+	)
+	parser.add_argument(
+		'--capacity',
+		type=int,
+		default=0,
+		help="wagon: seats per ride, 0 uses the coordinator's default",
+	)
+	parser.add_argument(
+		'--wagons',
+		type=int,
+		default=1,
+		help='wagon: host this many wagons behind one server',
+	)
+	parser.add_argument(
+		'--passengers',
+		type=int,
+		default=1,
+		help='passenger: host this many passengers behind one server',
+	)
+	parser.add_argument(
+		'--metrics-port',
+		type=int,
+		default=0,
+		help='rollercoaster: serve Prometheus metrics over HTTP on this port',
+	)
+	parser.add_argument(
+		'--max-waiting',
+		type=int,
+		help='rollercoaster: turn passengers away beyond this many waiting, '
+		"default twice the fleet's seats",
+	)
+	parser.add_argument(
+		'--lease',
+		type=float,
+		default=15.0,
+		help='rollercoaster: seconds without a heartbeat before a wagon or '
+		'passenger is forgotten, 0 to keep them forever',
+	)
+	parser.add_argument(
+		'--max-streams',
+		type=int,
+		default=64,
+		help='rollercoaster: subscriptions and status watches served at once '
+		'without --aio, each on a thread of its own; more are turned away',
+	)
+	parser.add_argument(
+		'--state-dir',
+		help='rollercoaster: keep a log and snapshots here and restore from them',
+	)
+	parser.add_argument(
+		'--shard-map',
+		help='wagon/passenger: HOST:PORT,... of sharded coordinators, '
+		'overrides rollercoaster_host and rollercoaster_port',
+	)
+	parser.add_argument(
+		'--shard',
+		action='store_true',
+		help='rollercoaster: one of the --shard-map coordinators; sends '
+		'passengers on to the next while it has no wagons',
+	)
+	parser.add_argument(
+		'--ride-duration',
+		type=float,
+		help='wagon: seconds a ride takes',
+	)
+	parser.add_argument(
+		'--retry-delay',
+		type=float,
+		nargs=2,
+		metavar=('MIN', 'MAX'),
+		help='wagon/passenger: seconds to wait before registering again',
+	)
+	config.add_arguments(parser)
+	args = parser.parse_args()
+	if (args.passengers > 1 or args.wagons > 1) and args.aio:
+		parser.error('--passengers and --wagons are not supported with --aio')
+	return args
 
-	service_type = sys.argv[1]
-	host = '0.0.0.0'
-	# host = (socket.gethostbyname(socket.gethostname()))
-	port = int(sys.argv[2])
-	rollercoaster_host = str(sys.argv[3]) if len(sys.argv) >= 4 else 'localhost'
-	rollercoaster_port = int(sys.argv[4]) if len(sys.argv) == 5 else 50051
 
-	if service_type not in ['rollercoaster', 'wagon', 'passenger']:
-		print(f'Unknown service type: {service_type}')
-		sys.exit(1)
+def configure(service: BaseService, args: argparse.Namespace) -> None:
+	service.configure(config.from_args(args))
+	if args.service_type == 'rollercoaster':
+		from services.rollercoaster_service import RollercoasterService
+
+		assert isinstance(service, RollercoasterService)
+		service.max_waiting_passengers = args.max_waiting
+		service.lease_duration = args.lease
+		service.max_streams = args.max_streams
+		service.sharded = args.shard
+		if args.state_dir:
+			service.open_journal(args.state_dir)
+		if args.metrics_port:
+			service.start_metrics_server(args.metrics_port)
+		return
+
+	from services.consumer_service import ConsumerService
+
+	assert isinstance(service, ConsumerService)
+	if args.shard_map:
+		from services.sharding import HashRing, parse_shard_map
+
+		service.shard_map = HashRing(parse_shard_map(args.shard_map))
+	if args.retry_delay:
+		service.retry_delay = tuple(args.retry_delay)
+	if args.service_type == 'wagon' and args.ride_duration is not None:
+		from services.wagon_fleet_service import WagonFleetService
+		from services.wagon_service import WagonService
+
+		assert isinstance(service, (WagonService | WagonFleetService))
+		service.ride_duration = args.ride_duration
 
-	service = create_service(
-		service_type, port, host, rollercoaster_host, rollercoaster_port
-	)
-	service.start_server()
-	print(f'{service_type} service started on {host}:{port}')
 
-	if (
-		isinstance(service, (WagonService | PassengerService))
-		and not service.register_with_rollercoaster()
-	):
+def serve(service: BaseService, service_type: str, host: str, port: int) -> None:
+	from services.consumer_service import ConsumerService
+
+	consumer = service if isinstance(service, ConsumerService) else None
+	if consumer is not None and consumer.subscribe:
+		consumer.open_subscription()
+	else:
+		service.start_server()
+		print(f'{service_type} service started on {host}:{port}')
+
+	if consumer is not None and not consumer.register_with_rollercoaster():
 		print(f'Failed to register {service_type}')
 		sys.exit(1)
 
@@ -62,5 +203,59 @@ def main() -> None:
 		service.stop_server()
 
 
+async def serve_async(
+	service: BaseService, service_type: str, host: str, port: int
+) -> None:
+	from services.aio.base import AioService
+	from services.aio.consumer_service import AioConsumerService
+
+	assert isinstance(service, AioService)
+	consumer = service if isinstance(service, AioConsumerService) else None
+	if consumer is not None and consumer.subscribe:
+		await consumer.open_subscription_async()
+	else:
+		await service.start_server_async()
+		print(f'{service_type} service started on {host}:{port} (aio)')
+
+	try:
+		if (
+			consumer is not None
+			and not await consumer.register_with_rollercoaster_async()
+		):
+			print(f'Failed to register {service_type}')
+			sys.exit(1)
+
+		await service.wait_for_termination_async()
+	finally:
+		await service.stop_server_async()
+
+
+def main() -> None:
+	args = parse_args()
+	host = '0.0.0.0'
+	# host = (socket.gethostbyname(socket.gethostname()))
+
+	service = create_service(
+		args.service_type,
+		args.port,
+		host,
+		args.rollercoaster_host,
+		args.rollercoaster_port,
+		args.aio,
+		args.subscribe,
+		args.capacity,
+		args.passengers,
+		args.wagons,
+	)
+	configure(service, args)
+	if args.aio:
+		import asyncio
+
+		with contextlib.suppress(KeyboardInterrupt):
+			asyncio.run(serve_async(service, args.service_type, host, args.port))
+	else:
+		serve(service, args.service_type, host, args.port)
+
+
 if __name__ == '__main__':
 	main()
@@ -25,7 +25,7 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x19proto/rollercoaster.proto\x12\rrollercoaster\x1a\x1bgoogle/protobuf/empty.proto\"\\\n\x0eStatusResponse\x12\x14\n\x0ctotal_wagons\x18\x01 \x01(\x05\x12\x18\n\x10total_passengers\x18\x02 \x01(\x05\x12\x1a\n\x12waiting_passengers\x18\x03 \x01(\x05\"1\n\x13RegistrationRequest\x12\x0c\n\x04host\x18\x01 \x01(\t\x12\x0c\n\x04port\x18\x02 \x01(\x05\"3\n\x14RegistrationResponse\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\"8\n\x0e\x61rrive_request\x12\x10\n\x08wagon_id\x18\x01 \x01(\x05\x12\x14\n\x0cpassenger_id\x18\x02 \x03(\x05\"\"\n\x0f\x61rrive_response\x12\x0f\n\x07success\x18\x01 \x01(\x08\"&\n\x0epassenger_list\x12\x14\n\x0cpassenger_id\x18\x01 \x03(\x05\x32H\n\x05wagon\x12?\n\x06\x64\x65part\x12\x1d.rollercoaster.passenger_list\x1a\x16.google.protobuf.Empty2\x91\x01\n\tpassenger\x12\x43\n\x11i_am_disembarking\x12\x16.google.protobuf.Empty\x1a\x16.google.protobuf.Empty\x12?\n\ri_am_boarding\x12\x16.google.protobuf.Empty\x1a\x16.google.protobuf.Empty2\xd7\x02\n\rrollercoaster\x12\x43\n\nget_status\x12\x16.google.protobuf.Empty\x1a\x1d.rollercoaster.StatusResponse\x12Y\n\x0eregister_wagon\x12\".rollercoaster.RegistrationRequest\x1a#.rollercoaster.RegistrationResponse\x12]\n\x12register_passenger\x12\".rollercoaster.RegistrationRequest\x1a#.rollercoaster.RegistrationResponse\x12G\n\x06\x61rrive\x12\x1d.rollercoaster.arrive_request\x1a\x1e.rollercoaster.arrive_responseB\x15Z\x13rollercoaster/protob\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x19proto/rollercoaster.proto\x12\rrollercoaster\x1a\x1bgoogle/protobuf/empty.proto\"\xac\x02\n\x0eStatusResponse\x12\x14\n\x0ctotal_wagons\x18\x01 \x01(\x05\x12\x18\n\x10total_passengers\x18\x02 \x01(\x05\x12\x1a\n\x12waiting_passengers\x18\x03 \x01(\x05\x12\x16\n\x0ewaiting_wagons\x18\x04 \x01(\x05\x12\x17\n\x0frides_in_flight\x18\x05 \x01(\x05\x12\x13\n\x0brides_total\x18\x06 \x01(\x03\x12\x18\n\x10rides_per_second\x18\x07 \x01(\x01\x12\x38\n\x16passenger_wait_seconds\x18\x08 \x01(\x0b\x32\x18.rollercoaster.Histogram\x12\x34\n\x12ride_cycle_seconds\x18\t \x01(\x0b\x32\x18.rollercoaster.Histogram\"\xc3\x02\n\x0cStatusUpdate\x12\x0f\n\x07version\x18\x01 \x01(\x03\x12\x19\n\x0ctotal_wagons\x18\x02 \x01(\x05H\x00\x88\x01\x01\x12\x1d\n\x10total_passengers\x18\x03 \x01(\x05H\x01\x88\x01\x01\x12\x1f\n\x12waiting_passengers\x18\x04 \x01(\x05H\x02\x88\x01\x01\x12\x1b\n\x0ewaiting_wagons\x18\x05 \x01(\x05H\x03\x88\x01\x01\x12\x1c\n\x0frides_in_flight\x18\x06 \x01(\x05H\x04\x88\x01\x01\x12\x18\n\x0brides_total\x18\x07 \x01(\x03H\x05\x88\x01\x01\x42\x0f\n\r_total_wagonsB\x13\n\x11_total_passengersB\x15\n\x13_waiting_passengersB\x11\n\x0f_waiting_wagonsB\x12\n\x10_rides_in_flightB\x0e\n\x0c_rides_total\"G\n\tHistogram\x12\x0e\n\x06\x62ounds\x18\x01 \x03(\x01\x12\x0e\n\x06\x63ounts\x18\x02 \x03(\x03\x12\x0b\n\x03sum\x18\x03 \x01(\x01\x12\r\n\x05\x63ount\x18\x04 \x01(\x03\"Q\n\x13RegistrationRequest\x12\x0c\n\x04host\x18\x01 \x01(\t\x12\x0c\n\x04port\x18\x02 \x01(\x05\x12\x10\n\x08\x63\x61pacity\x18\x03 \x01(\x05\x12\x0c\n\x04slot\x18\x04 \x01(\x05\"\x88\x01\n\x14RegistrationResponse\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x16\n\x0eretry_after_ms\x18\x03 \x01(\x05\x12\x16\n\x0equeue_position\x18\x04 \x01(\x05\x12\x10\n\x08lease_ms\x18\x05 \x01(\x05\x12\x11\n\tno_wagons\x18\x06 \x01(\x08\":\n\x10HeartbeatRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\r\n\x05wagon\x18\x02 \x01(\x08\x12\x0b\n\x03ids\x18\x03 \x03(\x05\"7\n\x11HeartbeatResponse\x12\r\n\x05known\x18\x01 \x01(\x08\x12\x13\n\x0bunknown_ids\x18\x02 \x03(\x05\"\'\n\x0fPassengerNotice\x12\x14\n\x0cpassenger_id\x18\x01 \x01(\x05\"&\n\x0ePassengerBatch\x12\x14\n\x0cpassenger_id\x18\x01 \x03(\x05\"N\n\x11RegistrationBatch\x12\x39\n\rregistrations\x18\x01 \x03(\x0b\x32\".rollercoaster.RegistrationRequest\"W\n\x19RegistrationBatchResponse\x12:\n\rregistrations\x18\x01 \x03(\x0b\x32#.rollercoaster.RegistrationResponse\"8\n\x0e\x61rrive_request\x12\x10\n\x08wagon_id\x18\x01 \x01(\x05\x12\x14\n\x0cpassenger_id\x18\x02 \x03(\x05\"\"\n\x0f\x61rrive_response\x12\x0f\n\x07success\x18\x01 \x01(\x08\"?\n\x0c\x41rrivalBatch\x12/\n\x08\x61rrivals\x18\x01 \x03(\x0b\x32\x1d.rollercoaster.arrive_request\"H\n\x14\x41rrivalBatchResponse\x12\x30\n\x08\x61rrivals\x18\x01 \x03(\x0b\x32\x1e.rollercoaster.arrive_response\"8\n\x0epassenger_list\x12\x14\n\x0cpassenger_id\x18\x01 \x03(\x05\x12\x10\n\x08wagon_id\x18\x02 \x01(\x05\"\x9f\x01\n\x05\x45vent\x12\'\n\x04kind\x18\x01 \x01(\x0e\x32\x19.rollercoaster.Event.Kind\x12\x14\n\x0cpassenger_id\x18\x02 \x03(\x05\x12\x10\n\x08wagon_id\x18\x03 \x01(\x05\"E\n\x04Kind\x12\x0e\n\nSUBSCRIBED\x10\x00\x12\x0c\n\x08\x42OARDING\x10\x01\x12\r\n\tDEPARTING\x10\x02\x12\x10\n\x0c\x44ISEMBARKING\x10\x03\x32H\n\x05wagon\x12?\n\x06\x64\x65part\x12\x1d.rollercoaster.passenger_list\x1a\x16.google.protobuf.Empty2\xbf\x02\n\tpassenger\x12K\n\x11i_am_disembarking\x12\x1e.rollercoaster.PassengerNotice\x1a\x16.google.protobuf.Empty\x12G\n\ri_am_boarding\x12\x1e.rollercoaster.PassengerNotice\x1a\x16.google.protobuf.Empty\x12O\n\x16i_am_disembarking_bulk\x12\x1d.rollercoaster.PassengerBatch\x1a\x16.google.protobuf.Empty\x12K\n\x12i_am_boarding_bulk\x12\x1d.rollercoaster.PassengerBatch\x1a\x16.google.protobuf.Empty2\xd4\x06\n\rrollercoaster\x12\x43\n\nget_status\x12\x16.google.protobuf.Empty\x1a\x1d.rollercoaster.StatusResponse\x12\x45\n\x0cwatch_status\x12\x16.google.protobuf.Empty\x1a\x1b.rollercoaster.StatusUpdate0\x01\x12Y\n\x0eregister_wagon\x12\".rollercoaster.RegistrationRequest\x1a#.rollercoaster.RegistrationResponse\x12]\n\x12register_passenger\x12\".rollercoaster.RegistrationRequest\x1a#.rollercoaster.RegistrationResponse\x12G\n\x06\x61rrive\x12\x1d.rollercoaster.arrive_request\x1a\x1e.rollercoaster.arrive_response\x12O\n\x0b\x61rrive_bulk\x12\x1b.rollercoaster.ArrivalBatch\x1a#.rollercoaster.ArrivalBatchResponse\x12\x62\n\x14register_wagons_bulk\x12 .rollercoaster.RegistrationBatch\x1a(.rollercoaster.RegistrationBatchResponse\x12\x66\n\x18register_passengers_bulk\x12 .rollercoaster.RegistrationBatch\x1a(.rollercoaster.RegistrationBatchResponse\x12G\n\tsubscribe\x12\".rollercoaster.RegistrationRequest\x1a\x14.rollercoaster.Event0\x01\x12N\n\theartbeat\x12\x1f.rollercoaster.HeartbeatRequest\x1a .rollercoaster.HeartbeatResponseB\x15Z\x13rollercoaster/protob\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,22 +33,46 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'proto.rollercoaster_pb2', _
 if not _descriptor._USE_C_DESCRIPTORS:
   _globals['DESCRIPTOR']._loaded_options = None
   _globals['DESCRIPTOR']._serialized_options = b'Z\023rollercoaster/proto'
-  _globals['_STATUSRESPONSE']._serialized_start=73
-  _globals['_STATUSRESPONSE']._serialized_end=165
-  _globals['_REGISTRATIONREQUEST']._serialized_start=167
-  _globals['_REGISTRATIONREQUEST']._serialized_end=216
-  _globals['_REGISTRATIONRESPONSE']._serialized_start=218
-  _globals['_REGISTRATIONRESPONSE']._serialized_end=269
-  _globals['_ARRIVE_REQUEST']._serialized_start=271
-  _globals['_ARRIVE_REQUEST']._serialized_end=327
-  _globals['_ARRIVE_RESPONSE']._serialized_start=329
-  _globals['_ARRIVE_RESPONSE']._serialized_end=363
-  _globals['_PASSENGER_LIST']._serialized_start=365
-  _globals['_PASSENGER_LIST']._serialized_end=403
-  _globals['_WAGON']._serialized_start=405
-  _globals['_WAGON']._serialized_end=477
-  _globals['_PASSENGER']._serialized_start=480
-  _globals['_PASSENGER']._serialized_end=625
-  _globals['_ROLLERCOASTER']._serialized_start=628
-  _globals['_ROLLERCOASTER']._serialized_end=971
+  _globals['_STATUSRESPONSE']._serialized_start=74
+  _globals['_STATUSRESPONSE']._serialized_end=374
+  _globals['_STATUSUPDATE']._serialized_start=377
+  _globals['_STATUSUPDATE']._serialized_end=700
+  _globals['_HISTOGRAM']._serialized_start=702
+  _globals['_HISTOGRAM']._serialized_end=773
+  _globals['_REGISTRATIONREQUEST']._serialized_start=775
+  _globals['_REGISTRATIONREQUEST']._serialized_end=856
+  _globals['_REGISTRATIONRESPONSE']._serialized_start=859
+  _globals['_REGISTRATIONRESPONSE']._serialized_end=995
+  _globals['_HEARTBEATREQUEST']._serialized_start=997
+  _globals['_HEARTBEATREQUEST']._serialized_end=1055
+  _globals['_HEARTBEATRESPONSE']._serialized_start=1057
+  _globals['_HEARTBEATRESPONSE']._serialized_end=1112
+  _globals['_PASSENGERNOTICE']._serialized_start=1114
+  _globals['_PASSENGERNOTICE']._serialized_end=1153
+  _globals['_PASSENGERBATCH']._serialized_start=1155
+  _globals['_PASSENGERBATCH']._serialized_end=1193
+  _globals['_REGISTRATIONBATCH']._serialized_start=1195
+  _globals['_REGISTRATIONBATCH']._serialized_end=1273
+  _globals['_REGISTRATIONBATCHRESPONSE']._serialized_start=1275
+  _globals['_REGISTRATIONBATCHRESPONSE']._serialized_end=1362
+  _globals['_ARRIVE_REQUEST']._serialized_start=1364
+  _globals['_ARRIVE_REQUEST']._serialized_end=1420
+  _globals['_ARRIVE_RESPONSE']._serialized_start=1422
+  _globals['_ARRIVE_RESPONSE']._serialized_end=1456
+  _globals['_ARRIVALBATCH']._serialized_start=1458
+  _globals['_ARRIVALBATCH']._serialized_end=1521
+  _globals['_ARRIVALBATCHRESPONSE']._serialized_start=1523
+  _globals['_ARRIVALBATCHRESPONSE']._serialized_end=1595
+  _globals['_PASSENGER_LIST']._serialized_start=1597
+  _globals['_PASSENGER_LIST']._serialized_end=1653
+  _globals['_EVENT']._serialized_start=1656
+  _globals['_EVENT']._serialized_end=1815
+  _globals['_EVENT_KIND']._serialized_start=1746
+  _globals['_EVENT_KIND']._serialized_end=1815
+  _globals['_WAGON']._serialized_start=1817
+  _globals['_WAGON']._serialized_end=1889
+  _globals['_PASSENGER']._serialized_start=1892
+  _globals['_PASSENGER']._serialized_end=2211
+  _globals['_ROLLERCOASTER']._serialized_start=2214
+  _globals['_ROLLERCOASTER']._serialized_end=3066
 # @@protoc_insertion_point(module_scope)
@@ -7,9 +7,16 @@ import builtins
 import collections.abc
 import google.protobuf.descriptor
 import google.protobuf.internal.containers
+import google.protobuf.internal.enum_type_wrapper
 import google.protobuf.message
+import sys
 import typing
 
+if sys.version_info >= (3, 10):
+    import typing as typing_extensions
+else:
+    import typing_extensions
+
 DESCRIPTOR: google.protobuf.descriptor.FileDescriptor
 
 @typing.final
@@ -19,35 +26,151 @@ class StatusResponse(google.protobuf.message.Message):
     TOTAL_WAGONS_FIELD_NUMBER: builtins.int
     TOTAL_PASSENGERS_FIELD_NUMBER: builtins.int
     WAITING_PASSENGERS_FIELD_NUMBER: builtins.int
+    WAITING_WAGONS_FIELD_NUMBER: builtins.int
+    RIDES_IN_FLIGHT_FIELD_NUMBER: builtins.int
+    RIDES_TOTAL_FIELD_NUMBER: builtins.int
+    RIDES_PER_SECOND_FIELD_NUMBER: builtins.int
+    PASSENGER_WAIT_SECONDS_FIELD_NUMBER: builtins.int
+    RIDE_CYCLE_SECONDS_FIELD_NUMBER: builtins.int
     total_wagons: builtins.int
     total_passengers: builtins.int
     waiting_passengers: builtins.int
+    waiting_wagons: builtins.int
+    rides_in_flight: builtins.int
+    """dispatched rides whose arrival has not been released yet"""
+    rides_total: builtins.int
+    rides_per_second: builtins.float
+    """completed rides per second over the last minute"""
+    @property
+    def passenger_wait_seconds(self) -> global___Histogram:
+        """registration to boarding"""
+
+    @property
+    def ride_cycle_seconds(self) -> global___Histogram:
+        """depart to arrive"""
+
     def __init__(
         self,
         *,
         total_wagons: builtins.int = ...,
         total_passengers: builtins.int = ...,
         waiting_passengers: builtins.int = ...,
+        waiting_wagons: builtins.int = ...,
+        rides_in_flight: builtins.int = ...,
+        rides_total: builtins.int = ...,
+        rides_per_second: builtins.float = ...,
+        passenger_wait_seconds: global___Histogram | None = ...,
+        ride_cycle_seconds: global___Histogram | None = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["total_passengers", b"total_passengers", "total_wagons", b"total_wagons", "waiting_passengers", b"waiting_passengers"]) -> None: ...
+    def HasField(self, field_name: typing.Literal["passenger_wait_seconds", b"passenger_wait_seconds", "ride_cycle_seconds", b"ride_cycle_seconds"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["passenger_wait_seconds", b"passenger_wait_seconds", "ride_cycle_seconds", b"ride_cycle_seconds", "rides_in_flight", b"rides_in_flight", "rides_per_second", b"rides_per_second", "rides_total", b"rides_total", "total_passengers", b"total_passengers", "total_wagons", b"total_wagons", "waiting_passengers", b"waiting_passengers", "waiting_wagons", b"waiting_wagons"]) -> None: ...
 
 global___StatusResponse = StatusResponse
 
+@typing.final
+class StatusUpdate(google.protobuf.message.Message):
+    """What watch_status sends: every count in the first message, and after
+    that only the ones that changed since the previous message
+    """
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    VERSION_FIELD_NUMBER: builtins.int
+    TOTAL_WAGONS_FIELD_NUMBER: builtins.int
+    TOTAL_PASSENGERS_FIELD_NUMBER: builtins.int
+    WAITING_PASSENGERS_FIELD_NUMBER: builtins.int
+    WAITING_WAGONS_FIELD_NUMBER: builtins.int
+    RIDES_IN_FLIGHT_FIELD_NUMBER: builtins.int
+    RIDES_TOTAL_FIELD_NUMBER: builtins.int
+    version: builtins.int
+    """goes up with every change, so a watcher can tell how many it skipped"""
+    total_wagons: builtins.int
+    total_passengers: builtins.int
+    waiting_passengers: builtins.int
+    waiting_wagons: builtins.int
+    rides_in_flight: builtins.int
+    rides_total: builtins.int
+    def __init__(
+        self,
+        *,
+        version: builtins.int = ...,
+        total_wagons: builtins.int | None = ...,
+        total_passengers: builtins.int | None = ...,
+        waiting_passengers: builtins.int | None = ...,
+        waiting_wagons: builtins.int | None = ...,
+        rides_in_flight: builtins.int | None = ...,
+        rides_total: builtins.int | None = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["_rides_in_flight", b"_rides_in_flight", "_rides_total", b"_rides_total", "_total_passengers", b"_total_passengers", "_total_wagons", b"_total_wagons", "_waiting_passengers", b"_waiting_passengers", "_waiting_wagons", b"_waiting_wagons", "rides_in_flight", b"rides_in_flight", "rides_total", b"rides_total", "total_passengers", b"total_passengers", "total_wagons", b"total_wagons", "waiting_passengers", b"waiting_passengers", "waiting_wagons", b"waiting_wagons"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["_rides_in_flight", b"_rides_in_flight", "_rides_total", b"_rides_total", "_total_passengers", b"_total_passengers", "_total_wagons", b"_total_wagons", "_waiting_passengers", b"_waiting_passengers", "_waiting_wagons", b"_waiting_wagons", "rides_in_flight", b"rides_in_flight", "rides_total", b"rides_total", "total_passengers", b"total_passengers", "total_wagons", b"total_wagons", "version", b"version", "waiting_passengers", b"waiting_passengers", "waiting_wagons", b"waiting_wagons"]) -> None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["_rides_in_flight", b"_rides_in_flight"]) -> typing.Literal["rides_in_flight"] | None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["_rides_total", b"_rides_total"]) -> typing.Literal["rides_total"] | None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["_total_passengers", b"_total_passengers"]) -> typing.Literal["total_passengers"] | None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["_total_wagons", b"_total_wagons"]) -> typing.Literal["total_wagons"] | None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["_waiting_passengers", b"_waiting_passengers"]) -> typing.Literal["waiting_passengers"] | None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["_waiting_wagons", b"_waiting_wagons"]) -> typing.Literal["waiting_wagons"] | None: ...
+
+global___StatusUpdate = StatusUpdate
+
+@typing.final
+class Histogram(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    BOUNDS_FIELD_NUMBER: builtins.int
+    COUNTS_FIELD_NUMBER: builtins.int
+    SUM_FIELD_NUMBER: builtins.int
+    COUNT_FIELD_NUMBER: builtins.int
+    sum: builtins.float
+    count: builtins.int
+    @property
+    def bounds(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]:
+        """upper bounds; counts has one more entry for everything above the last"""
+
+    @property
+    def counts(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    def __init__(
+        self,
+        *,
+        bounds: collections.abc.Iterable[builtins.float] | None = ...,
+        counts: collections.abc.Iterable[builtins.int] | None = ...,
+        sum: builtins.float = ...,
+        count: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["bounds", b"bounds", "count", b"count", "counts", b"counts", "sum", b"sum"]) -> None: ...
+
+global___Histogram = Histogram
+
 @typing.final
 class RegistrationRequest(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
 
     HOST_FIELD_NUMBER: builtins.int
     PORT_FIELD_NUMBER: builtins.int
+    CAPACITY_FIELD_NUMBER: builtins.int
+    SLOT_FIELD_NUMBER: builtins.int
     host: builtins.str
     port: builtins.int
+    capacity: builtins.int
+    """wagons only: seats per ride, 0 means the coordinator's default"""
+    slot: builtins.int
+    """tells apart registrations sharing one host and port, e.g. the
+    passengers of a passenger host
+    """
     def __init__(
         self,
         *,
         host: builtins.str = ...,
         port: builtins.int = ...,
+        capacity: builtins.int = ...,
+        slot: builtins.int = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["host", b"host", "port", b"port"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["capacity", b"capacity", "host", b"host", "port", b"port", "slot", b"slot"]) -> None: ...
 
 global___RegistrationRequest = RegistrationRequest
 
@@ -57,18 +180,145 @@ class RegistrationResponse(google.protobuf.message.Message):
 
     ID_FIELD_NUMBER: builtins.int
     SUCCESS_FIELD_NUMBER: builtins.int
+    RETRY_AFTER_MS_FIELD_NUMBER: builtins.int
+    QUEUE_POSITION_FIELD_NUMBER: builtins.int
+    LEASE_MS_FIELD_NUMBER: builtins.int
+    NO_WAGONS_FIELD_NUMBER: builtins.int
     id: builtins.int
     success: builtins.bool
+    retry_after_ms: builtins.int
+    """set when the waiting queue is full: register again after this long"""
+    queue_position: builtins.int
+    """1-based place in the waiting queue on joining it, 0 if already queued"""
+    lease_ms: builtins.int
+    """heartbeat well within this or be forgotten, 0 means no lease"""
+    no_wagons: builtins.bool
+    """set by a shard without wagons: try the next shard after retry_after_ms"""
     def __init__(
         self,
         *,
         id: builtins.int = ...,
         success: builtins.bool = ...,
+        retry_after_ms: builtins.int = ...,
+        queue_position: builtins.int = ...,
+        lease_ms: builtins.int = ...,
+        no_wagons: builtins.bool = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["id", b"id", "success", b"success"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["id", b"id", "lease_ms", b"lease_ms", "no_wagons", b"no_wagons", "queue_position", b"queue_position", "retry_after_ms", b"retry_after_ms", "success", b"success"]) -> None: ...
 
 global___RegistrationResponse = RegistrationResponse
 
+@typing.final
+class HeartbeatRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ID_FIELD_NUMBER: builtins.int
+    WAGON_FIELD_NUMBER: builtins.int
+    IDS_FIELD_NUMBER: builtins.int
+    id: builtins.int
+    wagon: builtins.bool
+    @property
+    def ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]:
+        """more registrations of the same kind, renewed by the same call"""
+
+    def __init__(
+        self,
+        *,
+        id: builtins.int = ...,
+        wagon: builtins.bool = ...,
+        ids: collections.abc.Iterable[builtins.int] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["id", b"id", "ids", b"ids", "wagon", b"wagon"]) -> None: ...
+
+global___HeartbeatRequest = HeartbeatRequest
+
+@typing.final
+class HeartbeatResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    KNOWN_FIELD_NUMBER: builtins.int
+    UNKNOWN_IDS_FIELD_NUMBER: builtins.int
+    known: builtins.bool
+    """false once a lease has run out: register again"""
+    @property
+    def unknown_ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]:
+        """which of id and ids have run out"""
+
+    def __init__(
+        self,
+        *,
+        known: builtins.bool = ...,
+        unknown_ids: collections.abc.Iterable[builtins.int] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["known", b"known", "unknown_ids", b"unknown_ids"]) -> None: ...
+
+global___HeartbeatResponse = HeartbeatResponse
+
+@typing.final
+class PassengerNotice(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    PASSENGER_ID_FIELD_NUMBER: builtins.int
+    passenger_id: builtins.int
+    def __init__(
+        self,
+        *,
+        passenger_id: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["passenger_id", b"passenger_id"]) -> None: ...
+
+global___PassengerNotice = PassengerNotice
+
+@typing.final
+class PassengerBatch(google.protobuf.message.Message):
+    """passengers behind one endpoint, all told the same thing in one call"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    PASSENGER_ID_FIELD_NUMBER: builtins.int
+    @property
+    def passenger_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    def __init__(
+        self,
+        *,
+        passenger_id: collections.abc.Iterable[builtins.int] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["passenger_id", b"passenger_id"]) -> None: ...
+
+global___PassengerBatch = PassengerBatch
+
+@typing.final
+class RegistrationBatch(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    REGISTRATIONS_FIELD_NUMBER: builtins.int
+    @property
+    def registrations(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___RegistrationRequest]: ...
+    def __init__(
+        self,
+        *,
+        registrations: collections.abc.Iterable[global___RegistrationRequest] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["registrations", b"registrations"]) -> None: ...
+
+global___RegistrationBatch = RegistrationBatch
+
+@typing.final
+class RegistrationBatchResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    REGISTRATIONS_FIELD_NUMBER: builtins.int
+    @property
+    def registrations(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___RegistrationResponse]: ...
+    def __init__(
+        self,
+        *,
+        registrations: collections.abc.Iterable[global___RegistrationResponse] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["registrations", b"registrations"]) -> None: ...
+
+global___RegistrationBatchResponse = RegistrationBatchResponse
+
 @typing.final
 class arrive_request(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
@@ -103,18 +353,96 @@ class arrive_response(google.protobuf.message.Message):
 
 global___arrive_response = arrive_response
 
+@typing.final
+class ArrivalBatch(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ARRIVALS_FIELD_NUMBER: builtins.int
+    @property
+    def arrivals(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___arrive_request]: ...
+    def __init__(
+        self,
+        *,
+        arrivals: collections.abc.Iterable[global___arrive_request] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["arrivals", b"arrivals"]) -> None: ...
+
+global___ArrivalBatch = ArrivalBatch
+
+@typing.final
+class ArrivalBatchResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ARRIVALS_FIELD_NUMBER: builtins.int
+    @property
+    def arrivals(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___arrive_response]: ...
+    def __init__(
+        self,
+        *,
+        arrivals: collections.abc.Iterable[global___arrive_response] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["arrivals", b"arrivals"]) -> None: ...
+
+global___ArrivalBatchResponse = ArrivalBatchResponse
+
 @typing.final
 class passenger_list(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
 
     PASSENGER_ID_FIELD_NUMBER: builtins.int
+    WAGON_ID_FIELD_NUMBER: builtins.int
+    wagon_id: builtins.int
+    """which wagon departs, for a process hosting several"""
     @property
     def passenger_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
     def __init__(
         self,
         *,
         passenger_id: collections.abc.Iterable[builtins.int] | None = ...,
+        wagon_id: builtins.int = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["passenger_id", b"passenger_id"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["passenger_id", b"passenger_id", "wagon_id", b"wagon_id"]) -> None: ...
 
 global___passenger_list = passenger_list
+
+@typing.final
+class Event(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    class _Kind:
+        ValueType = typing.NewType("ValueType", builtins.int)
+        V: typing_extensions.TypeAlias = ValueType
+
+    class _KindEnumTypeWrapper(google.protobuf.internal.enum_type_wrapper._EnumTypeWrapper[Event._Kind.ValueType], builtins.type):
+        DESCRIPTOR: google.protobuf.descriptor.EnumDescriptor
+        SUBSCRIBED: Event._Kind.ValueType  # 0
+        """first event on every stream, once the subscription is in place"""
+        BOARDING: Event._Kind.ValueType  # 1
+        DEPARTING: Event._Kind.ValueType  # 2
+        DISEMBARKING: Event._Kind.ValueType  # 3
+
+    class Kind(_Kind, metaclass=_KindEnumTypeWrapper): ...
+    SUBSCRIBED: Event.Kind.ValueType  # 0
+    """first event on every stream, once the subscription is in place"""
+    BOARDING: Event.Kind.ValueType  # 1
+    DEPARTING: Event.Kind.ValueType  # 2
+    DISEMBARKING: Event.Kind.ValueType  # 3
+
+    KIND_FIELD_NUMBER: builtins.int
+    PASSENGER_ID_FIELD_NUMBER: builtins.int
+    WAGON_ID_FIELD_NUMBER: builtins.int
+    kind: global___Event.Kind.ValueType
+    wagon_id: builtins.int
+    """DEPARTING only"""
+    @property
+    def passenger_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    def __init__(
+        self,
+        *,
+        kind: global___Event.Kind.ValueType = ...,
+        passenger_id: collections.abc.Iterable[builtins.int] | None = ...,
+        wagon_id: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["kind", b"kind", "passenger_id", b"passenger_id", "wagon_id", b"wagon_id"]) -> None: ...
+
+global___Event = Event
@@ -109,12 +109,22 @@ class passengerStub(object):
         """
         self.i_am_disembarking = channel.unary_unary(
                 '/rollercoaster.passenger/i_am_disembarking',
-                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                request_serializer=proto_dot_rollercoaster__pb2.PassengerNotice.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 _registered_method=True)
         self.i_am_boarding = channel.unary_unary(
                 '/rollercoaster.passenger/i_am_boarding',
-                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                request_serializer=proto_dot_rollercoaster__pb2.PassengerNotice.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+        self.i_am_disembarking_bulk = channel.unary_unary(
+                '/rollercoaster.passenger/i_am_disembarking_bulk',
+                request_serializer=proto_dot_rollercoaster__pb2.PassengerBatch.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+        self.i_am_boarding_bulk = channel.unary_unary(
+                '/rollercoaster.passenger/i_am_boarding_bulk',
+                request_serializer=proto_dot_rollercoaster__pb2.PassengerBatch.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 _registered_method=True)
 
@@ -134,17 +144,40 @@ class passengerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def i_am_disembarking_bulk(self, request, context):
+        """what the coordinator sends, one call per endpoint for all of its passengers
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def i_am_boarding_bulk(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_passengerServicer_to_server(servicer, server):
     rpc_method_handlers = {
             'i_am_disembarking': grpc.unary_unary_rpc_method_handler(
                     servicer.i_am_disembarking,
-                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    request_deserializer=proto_dot_rollercoaster__pb2.PassengerNotice.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
             'i_am_boarding': grpc.unary_unary_rpc_method_handler(
                     servicer.i_am_boarding,
-                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    request_deserializer=proto_dot_rollercoaster__pb2.PassengerNotice.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'i_am_disembarking_bulk': grpc.unary_unary_rpc_method_handler(
+                    servicer.i_am_disembarking_bulk,
+                    request_deserializer=proto_dot_rollercoaster__pb2.PassengerBatch.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'i_am_boarding_bulk': grpc.unary_unary_rpc_method_handler(
+                    servicer.i_am_boarding_bulk,
+                    request_deserializer=proto_dot_rollercoaster__pb2.PassengerBatch.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
     }
@@ -173,7 +206,7 @@ class passenger(object):
             request,
             target,
             '/rollercoaster.passenger/i_am_disembarking',
-            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            proto_dot_rollercoaster__pb2.PassengerNotice.SerializeToString,
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options,
             channel_credentials,
@@ -200,7 +233,61 @@ class passenger(object):
             request,
             target,
             '/rollercoaster.passenger/i_am_boarding',
-            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            proto_dot_rollercoaster__pb2.PassengerNotice.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def i_am_disembarking_bulk(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rollercoaster.passenger/i_am_disembarking_bulk',
+            proto_dot_rollercoaster__pb2.PassengerBatch.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def i_am_boarding_bulk(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rollercoaster.passenger/i_am_boarding_bulk',
+            proto_dot_rollercoaster__pb2.PassengerBatch.SerializeToString,
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options,
             channel_credentials,
@@ -227,6 +314,11 @@ class rollercoasterStub(object):
                 request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
                 response_deserializer=proto_dot_rollercoaster__pb2.StatusResponse.FromString,
                 _registered_method=True)
+        self.watch_status = channel.unary_stream(
+                '/rollercoaster.rollercoaster/watch_status',
+                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                response_deserializer=proto_dot_rollercoaster__pb2.StatusUpdate.FromString,
+                _registered_method=True)
         self.register_wagon = channel.unary_unary(
                 '/rollercoaster.rollercoaster/register_wagon',
                 request_serializer=proto_dot_rollercoaster__pb2.RegistrationRequest.SerializeToString,
@@ -242,6 +334,31 @@ class rollercoasterStub(object):
                 request_serializer=proto_dot_rollercoaster__pb2.arrive_request.SerializeToString,
                 response_deserializer=proto_dot_rollercoaster__pb2.arrive_response.FromString,
                 _registered_method=True)
+        self.arrive_bulk = channel.unary_unary(
+                '/rollercoaster.rollercoaster/arrive_bulk',
+                request_serializer=proto_dot_rollercoaster__pb2.ArrivalBatch.SerializeToString,
+                response_deserializer=proto_dot_rollercoaster__pb2.ArrivalBatchResponse.FromString,
+                _registered_method=True)
+        self.register_wagons_bulk = channel.unary_unary(
+                '/rollercoaster.rollercoaster/register_wagons_bulk',
+                request_serializer=proto_dot_rollercoaster__pb2.RegistrationBatch.SerializeToString,
+                response_deserializer=proto_dot_rollercoaster__pb2.RegistrationBatchResponse.FromString,
+                _registered_method=True)
+        self.register_passengers_bulk = channel.unary_unary(
+                '/rollercoaster.rollercoaster/register_passengers_bulk',
+                request_serializer=proto_dot_rollercoaster__pb2.RegistrationBatch.SerializeToString,
+                response_deserializer=proto_dot_rollercoaster__pb2.RegistrationBatchResponse.FromString,
+                _registered_method=True)
+        self.subscribe = channel.unary_stream(
+                '/rollercoaster.rollercoaster/subscribe',
+                request_serializer=proto_dot_rollercoaster__pb2.RegistrationRequest.SerializeToString,
+                response_deserializer=proto_dot_rollercoaster__pb2.Event.FromString,
+                _registered_method=True)
+        self.heartbeat = channel.unary_unary(
+                '/rollercoaster.rollercoaster/heartbeat',
+                request_serializer=proto_dot_rollercoaster__pb2.HeartbeatRequest.SerializeToString,
+                response_deserializer=proto_dot_rollercoaster__pb2.HeartbeatResponse.FromString,
+                _registered_method=True)
 
 
 class rollercoasterServicer(object):
@@ -253,6 +370,16 @@ class rollercoasterServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def watch_status(self, request, context):
+        """streams changes to the counts in StatusResponse instead of polling.
+        Without --aio every watch holds a server thread, so watches and
+        subscriptions together are capped at --max-streams and the rest fail
+        with RESOURCE_EXHAUSTED; with --aio there is no cap.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def register_wagon(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -272,6 +399,40 @@ class rollercoasterServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def arrive_bulk(self, request, context):
+        """several arrivals under one lock acquisition, acknowledged in order
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def register_wagons_bulk(self, request, context):
+        """register a whole batch under one lock acquisition, IDs come back in order
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def register_passengers_bulk(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def subscribe(self, request, context):
+        """push boarding, departing and disembarking events instead of calling back
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def heartbeat(self, request, context):
+        """keeps a registration's lease alive
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_rollercoasterServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -280,6 +441,11 @@ def add_rollercoasterServicer_to_server(servicer, server):
                     request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                     response_serializer=proto_dot_rollercoaster__pb2.StatusResponse.SerializeToString,
             ),
+            'watch_status': grpc.unary_stream_rpc_method_handler(
+                    servicer.watch_status,
+                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    response_serializer=proto_dot_rollercoaster__pb2.StatusUpdate.SerializeToString,
+            ),
             'register_wagon': grpc.unary_unary_rpc_method_handler(
                     servicer.register_wagon,
                     request_deserializer=proto_dot_rollercoaster__pb2.RegistrationRequest.FromString,
@@ -295,6 +461,31 @@ def add_rollercoasterServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_rollercoaster__pb2.arrive_request.FromString,
                     response_serializer=proto_dot_rollercoaster__pb2.arrive_response.SerializeToString,
             ),
+            'arrive_bulk': grpc.unary_unary_rpc_method_handler(
+                    servicer.arrive_bulk,
+                    request_deserializer=proto_dot_rollercoaster__pb2.ArrivalBatch.FromString,
+                    response_serializer=proto_dot_rollercoaster__pb2.ArrivalBatchResponse.SerializeToString,
+            ),
+            'register_wagons_bulk': grpc.unary_unary_rpc_method_handler(
+                    servicer.register_wagons_bulk,
+                    request_deserializer=proto_dot_rollercoaster__pb2.RegistrationBatch.FromString,
+                    response_serializer=proto_dot_rollercoaster__pb2.RegistrationBatchResponse.SerializeToString,
+            ),
+            'register_passengers_bulk': grpc.unary_unary_rpc_method_handler(
+                    servicer.register_passengers_bulk,
+                    request_deserializer=proto_dot_rollercoaster__pb2.RegistrationBatch.FromString,
+                    response_serializer=proto_dot_rollercoaster__pb2.RegistrationBatchResponse.SerializeToString,
+            ),
+            'subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.subscribe,
+                    request_deserializer=proto_dot_rollercoaster__pb2.RegistrationRequest.FromString,
+                    response_serializer=proto_dot_rollercoaster__pb2.Event.SerializeToString,
+            ),
+            'heartbeat': grpc.unary_unary_rpc_method_handler(
+                    servicer.heartbeat,
+                    request_deserializer=proto_dot_rollercoaster__pb2.HeartbeatRequest.FromString,
+                    response_serializer=proto_dot_rollercoaster__pb2.HeartbeatResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'rollercoaster.rollercoaster', rpc_method_handlers)
@@ -333,6 +524,33 @@ class rollercoaster(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def watch_status(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/rollercoaster.rollercoaster/watch_status',
+            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            proto_dot_rollercoaster__pb2.StatusUpdate.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def register_wagon(request,
             target,
@@ -413,3 +631,138 @@ class rollercoaster(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def arrive_bulk(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rollercoaster.rollercoaster/arrive_bulk',
+            proto_dot_rollercoaster__pb2.ArrivalBatch.SerializeToString,
+            proto_dot_rollercoaster__pb2.ArrivalBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def register_wagons_bulk(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rollercoaster.rollercoaster/register_wagons_bulk',
+            proto_dot_rollercoaster__pb2.RegistrationBatch.SerializeToString,
+            proto_dot_rollercoaster__pb2.RegistrationBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def register_passengers_bulk(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rollercoaster.rollercoaster/register_passengers_bulk',
+            proto_dot_rollercoaster__pb2.RegistrationBatch.SerializeToString,
+            proto_dot_rollercoaster__pb2.RegistrationBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/rollercoaster.rollercoaster/subscribe',
+            proto_dot_rollercoaster__pb2.RegistrationRequest.SerializeToString,
+            proto_dot_rollercoaster__pb2.Event.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def heartbeat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rollercoaster.rollercoaster/heartbeat',
+            proto_dot_rollercoaster__pb2.HeartbeatRequest.SerializeToString,
+            proto_dot_rollercoaster__pb2.HeartbeatResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,63 @@
+import asyncio
+from abc import abstractmethod
+from collections.abc import Coroutine
+from concurrent import futures
+from typing import Any
+
+import grpc
+
+from services.base import BaseService
+from services.channel_pool import ChannelPool
+
+
+class AioService(BaseService):
+	def __init__(self, *args: Any, **kwargs: Any) -> None:
+		super().__init__(*args, **kwargs)
+		self.aio_server: grpc.aio.Server | None = None
+		self.channels = ChannelPool(channel_factory=grpc.aio.insecure_channel)
+		self._tasks: set[asyncio.Task] = set()
+
+	async def start_server_async(self) -> None:
+		if self.aio_server is not None:
+			return
+
+		# Handlers that are not coroutines still work, on this small pool
+		self.aio_server = grpc.aio.server(
+			migration_thread_pool=futures.ThreadPoolExecutor(
+				max_workers=self.config.max_workers or 2
+			),
+			options=self.config.server_options(),
+			maximum_concurrent_rpcs=self.config.maximum_concurrent_rpcs,
+		)
+		self._configure_aio_server(self.aio_server)
+		self.aio_server.add_insecure_port(self.address)
+		await self.aio_server.start()
+
+	async def stop_server_async(self) -> None:
+		if self.aio_server is not None:
+			await self.aio_server.stop(grace=5)
+			self.aio_server = None
+		for task in list(self._tasks):
+			task.cancel()
+		for channel in self.channels.drain():
+			await channel.close()
+
+	async def wait_for_termination_async(self) -> None:
+		if self.aio_server is not None:
+			# Cancelling grpc's wait would cancel the future its shutdown waits
+			# on too, and stop_server_async would never get past stopping
+			await asyncio.shield(self.aio_server.wait_for_termination())
+
+	def stop_server(self) -> None:
+		self._spawn(self.stop_server_async())
+
+	@abstractmethod
+	def _configure_aio_server(self, server: grpc.aio.Server) -> None:
+		pass
+
+	def _spawn(self, coro: Coroutine[Any, Any, object]) -> asyncio.Task:
+		# The event loop only keeps weak references to tasks
+		task = asyncio.get_running_loop().create_task(coro)
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+		return task
@@ -0,0 +1,85 @@
+import asyncio
+from collections.abc import Callable
+
+import grpc
+
+from proto import rollercoaster_pb2
+from services.aio.base import AioService
+from services.consumer_service import ConsumerService
+
+
+class AioConsumerService(AioService, ConsumerService):
+	def __init__(self, *args, **kwargs) -> None:
+		super().__init__(*args, **kwargs)
+		self._event_task: asyncio.Task | None = None
+
+	def _call_later(self, delay: float, callback: Callable[[], object]) -> None:
+		asyncio.get_running_loop().call_later(delay, callback)
+
+	def _retry_registration(self) -> None:
+		self._spawn(self.register_with_rollercoaster_async())
+
+	async def register_with_rollercoaster_async(self) -> bool: ...
+
+	def _heartbeat(self) -> None:
+		self._spawn(self._heartbeat_async())
+
+	async def _heartbeat_async(self) -> None:
+		response = None
+		request = self._heartbeat_request()
+		try:
+			if request is not None:
+				response = await self._rollercoaster_stub().heartbeat(
+					request, timeout=self.lease / 3
+				)
+		except grpc.aio.AioRpcError as e:
+			print(f'Heartbeat failed: {e.code()}')
+		self._heartbeat_done(response)
+
+	async def open_subscription_async(self) -> None:
+		stub = self._rollercoaster_stub()
+		events = stub.subscribe(self._registration_request())
+		try:
+			# Wait for the coordinator to confirm before registering for a ride
+			await events.read()
+		except grpc.aio.AioRpcError as e:
+			if e.code() != grpc.StatusCode.RESOURCE_EXHAUSTED:
+				raise
+			self._take_calls(e.details())
+			await self.start_server_async()
+			return
+		print('subscribed to rollercoaster events')
+		self._events = events
+		self._event_task = self._spawn(self._consume_events_async(events))
+
+	def _next_shard(self) -> None:
+		events, self._events = self._events, None
+		super()._next_shard()
+		if events is not None:
+			self._spawn(self._move_subscription_async(events))
+
+	async def _move_subscription_async(self, events) -> None:
+		await self.open_subscription_async()
+		events.cancel()
+
+	async def _consume_events_async(self, events) -> None:
+		try:
+			# read() hands back grpc.aio.EOF once the stream ends
+			while isinstance(event := await events.read(), rollercoaster_pb2.Event):
+				self._handle_event(event)
+		except grpc.aio.AioRpcError as e:
+			if e.code() != grpc.StatusCode.CANCELLED:
+				print(f'Event stream closed: {e}')
+
+	async def stop_server_async(self) -> None:
+		self._heartbeating = False
+		await super().stop_server_async()
+
+	async def wait_for_termination_async(self) -> None:
+		# Moving shards swaps in a new event task before the old one ends
+		while self.aio_server is None and self._event_task is not None:
+			task = self._event_task
+			await asyncio.gather(task, return_exceptions=True)
+			if task is self._event_task:
+				break
+		await super().wait_for_termination_async()
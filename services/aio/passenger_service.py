@@ -0,0 +1,36 @@
+import grpc
+from google.protobuf import empty_pb2
+
+from proto import rollercoaster_pb2_grpc
+from services.aio.consumer_service import AioConsumerService
+from services.passenger_service import PassengerService
+
+
+class AioPassengerService(AioConsumerService, PassengerService):
+	def _configure_aio_server(self, server: grpc.aio.Server) -> None:
+		rollercoaster_pb2_grpc.add_passengerServicer_to_server(
+			_AioPassengerServicer(self), server
+		)
+
+	async def register_with_rollercoaster_async(self) -> bool:
+		stub = self._rollercoaster_stub()
+		request = self._registration_request()
+		return self._handle_registration(await stub.register_passenger(request))
+
+
+class _AioPassengerServicer(rollercoaster_pb2_grpc.passengerServicer):
+	# The passenger handlers never block, so they are shared with the sync service
+	def __init__(self, service: AioPassengerService) -> None:
+		self.service = service
+
+	async def i_am_boarding(self, request, context) -> empty_pb2.Empty:
+		return self.service.i_am_boarding(request, context)
+
+	async def i_am_disembarking(self, request, context) -> empty_pb2.Empty:
+		return self.service.i_am_disembarking(request, context)
+
+	async def i_am_boarding_bulk(self, request, context) -> empty_pb2.Empty:
+		return self.service.i_am_boarding_bulk(request, context)
+
+	async def i_am_disembarking_bulk(self, request, context) -> empty_pb2.Empty:
+		return self.service.i_am_disembarking_bulk(request, context)
@@ -0,0 +1,236 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Callable
+
+import grpc
+
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services.aio.base import AioService
+from services.coalescer import Batch, Endpoint
+from services.rollercoaster_service import Ride, RollercoasterService, _status_update
+
+
+class AioRollercoasterService(AioService, RollercoasterService):
+	def __init__(self, host: str = '0.0.0.0', port: int = 50051) -> None:
+		super().__init__(host, port)
+		self._ride_event = asyncio.Event()
+		self._loop: asyncio.AbstractEventLoop | None = None
+
+	def _configure_aio_server(self, server: grpc.aio.Server) -> None:
+		rollercoaster_pb2_grpc.add_rollercoasterServicer_to_server(
+			_AioRollercoasterServicer(self), server
+		)
+
+	async def start_server_async(self) -> None:
+		await super().start_server_async()
+		self._loop = asyncio.get_running_loop()
+		self._running = True
+		# One pass straight away, for whatever a recovery left to do
+		self._ride_event.set()
+		self._spawn(self._ride_coordinator_async())
+
+	async def stop_server_async(self) -> None:
+		self._running = False
+		self._ride_event.set()
+		with self._lock:
+			subscribers = list(self._subscribers.values())
+		for publish in subscribers:
+			publish(None)
+		self._status.close()
+		if self._stop_metrics is not None:
+			self._stop_metrics()
+		# Also closes every pooled channel
+		await super().stop_server_async()
+		self._close_journal()
+		self.notifier.shutdown()
+		print(f'channel pool: {self.channels.stats()}')
+		print(f'notifications: {self.notifier.stats()}')
+
+	def _call_later(self, delay: float, callback: Callable[[], object]) -> None:
+		asyncio.get_running_loop().call_later(delay, callback)
+
+	def _wake_coordinator(self) -> None:
+		if self._loop is None:
+			return
+		try:
+			in_loop = asyncio.get_running_loop() is self._loop
+		except RuntimeError:
+			in_loop = False
+		if in_loop:
+			self._ride_event.set()
+		else:
+			self._loop.call_soon_threadsafe(self._ride_event.set)
+
+	async def _ride_coordinator_async(self) -> None:
+		print('started coordinating')
+		while self._running:
+			# Wakes up at least once a lease to reap expired entries
+			with contextlib.suppress(TimeoutError):
+				await asyncio.wait_for(
+					self._ride_event.wait(), self.lease_duration or None
+				)
+			self._ride_event.clear()
+			if not self._running:
+				break
+			with self._lock:
+				rides, released = self._take_rides()
+			self.disembark_passengers(released)
+			for ride in rides:
+				self._spawn(self._coordinate_ride_async(ride))
+
+	async def _coordinate_ride_async(self, ride: Ride) -> None:
+		pids = list(ride.passengers)
+		print(f'{len(pids)} passengers boarding')
+		batches = self._queue_boarding(ride.passengers)
+		results = await asyncio.gather(
+			*(asyncio.wrap_future(done) for done in batches),
+			return_exceptions=True,
+		)
+		failed = {
+			pid
+			for batch_pids, result in zip(batches.values(), results, strict=True)
+			if isinstance(result, BaseException)
+			for pid in batch_pids
+		}
+		if failed:
+			print(f'Ride coordination error: {len(failed)} passengers unreachable')
+			boarded = [pid for pid in pids if pid not in failed]
+			self.disembark_passengers(
+				self._requeue_ride(ride, boarded, requeue_wagon=True)
+			)
+			return
+		self._ride_boarded(ride)
+
+		if self._publish(
+			ride.wagon, rollercoaster_pb2.Event.DEPARTING, pids, ride.wagon_id
+		):
+			self._ride_departed(ride)
+			return
+		stub = self.get_stub(*ride.wagon, rollercoaster_pb2_grpc.wagonStub)
+		try:
+			print('wagon depart')
+			await stub.depart(
+				rollercoaster_pb2.passenger_list(
+					passenger_id=pids, wagon_id=ride.wagon_id
+				),
+				timeout=self.rpc_timeout,
+			)
+		except grpc.aio.AioRpcError as e:
+			print(f'Ride coordination error: {e}')
+			self.disembark_passengers(
+				self._requeue_ride(ride, pids, requeue_wagon=False)
+			)
+			return
+		self._ride_departed(ride)
+
+	def _send_boarding(self, endpoint: Endpoint, batch: Batch) -> None:
+		self._spawn(self._send_boarding_async(endpoint, batch))
+
+	async def _send_boarding_async(self, endpoint: Endpoint, batch: Batch) -> None:
+		try:
+			stub = self.get_stub(*endpoint, rollercoaster_pb2_grpc.passengerStub)
+			await stub.i_am_boarding_bulk(
+				rollercoaster_pb2.PassengerBatch(passenger_id=batch.passenger_ids),
+				timeout=self.rpc_timeout,
+			)
+		except Exception as e:
+			# Whatever went wrong, the rides waiting on the batch must hear of it
+			batch.settle(e)
+			return
+		batch.settle(None)
+
+	def _send_disembarking(self, endpoint: Endpoint, batch: Batch) -> None:
+		print(f'{len(batch.passenger_ids)} passengers disembarking')
+		stub = self.get_stub(*endpoint, rollercoaster_pb2_grpc.passengerStub)
+		request = rollercoaster_pb2.PassengerBatch(passenger_id=batch.passenger_ids)
+		self._spawn(
+			self.notifier.deliver_async(
+				lambda timeout: stub.i_am_disembarking_bulk(request, timeout=timeout)
+			)
+		)
+		batch.settle(None)
+
+
+class _AioRollercoasterServicer(rollercoaster_pb2_grpc.rollercoasterServicer):
+	# The unary handlers only touch in-memory state and hand notifications
+	# to tasks, so they are shared with the sync service; the streams wait
+	# on the event loop instead of a worker thread
+	def __init__(self, service: AioRollercoasterService) -> None:
+		self.service = service
+
+	async def get_status(self, request, context) -> rollercoaster_pb2.StatusResponse:
+		return self.service.get_status(request, context)
+
+	async def watch_status(
+		self, request, context
+	) -> AsyncIterator[rollercoaster_pb2.StatusUpdate]:
+		# A watch here is a coroutine rather than a thread, so unlike the sync
+		# one it doesn't count against max_streams
+		changed = asyncio.Event()
+		loop = asyncio.get_running_loop()
+
+		def wake() -> None:
+			if not changed.is_set():
+				loop.call_soon_threadsafe(changed.set)
+
+		board = self.service._status
+		unwatch = board.watch(wake)
+		try:
+			sent = None
+			while not board.closed:
+				changed.clear()
+				status = board.current
+				if sent is None or status.version != sent.version:
+					yield _status_update(status, sent)
+					sent = status
+				await changed.wait()
+				await asyncio.sleep(self.service.status_interval)
+		finally:
+			unwatch()
+
+	async def register_wagon(
+		self, request, context
+	) -> rollercoaster_pb2.RegistrationResponse:
+		return self.service.register_wagon(request, context)
+
+	async def register_passenger(
+		self, request, context
+	) -> rollercoaster_pb2.RegistrationResponse:
+		return self.service.register_passenger(request, context)
+
+	async def register_wagons_bulk(
+		self, request, context
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		return self.service.register_wagons_bulk(request, context)
+
+	async def register_passengers_bulk(
+		self, request, context
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		return self.service.register_passengers_bulk(request, context)
+
+	async def heartbeat(self, request, context) -> rollercoaster_pb2.HeartbeatResponse:
+		return self.service.heartbeat(request, context)
+
+	async def arrive(self, request, context) -> rollercoaster_pb2.arrive_response:
+		return self.service.arrive(request, context)
+
+	async def arrive_bulk(
+		self, request, context
+	) -> rollercoaster_pb2.ArrivalBatchResponse:
+		return self.service.arrive_bulk(request, context)
+
+	async def subscribe(
+		self, request, context
+	) -> AsyncIterator[rollercoaster_pb2.Event]:
+		events: asyncio.Queue[rollercoaster_pb2.Event | None] = asyncio.Queue()
+		loop = asyncio.get_running_loop()
+		unsubscribe = self.service._subscribe(
+			(request.host, request.port),
+			lambda event: loop.call_soon_threadsafe(events.put_nowait, event),
+		)
+		try:
+			yield rollercoaster_pb2.Event(kind=rollercoaster_pb2.Event.SUBSCRIBED)
+			while (event := await events.get()) is not None:
+				yield event
+		finally:
+			unsubscribe()
@@ -0,0 +1,55 @@
+import asyncio
+
+import grpc
+from google.protobuf import empty_pb2
+
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services.aio.consumer_service import AioConsumerService
+from services.wagon_service import WagonService
+
+
+class AioWagonService(AioConsumerService, WagonService):
+	def _configure_aio_server(self, server: grpc.aio.Server) -> None:
+		rollercoaster_pb2_grpc.add_wagonServicer_to_server(
+			_AioWagonServicer(self), server
+		)
+
+	async def register_with_rollercoaster_async(self) -> bool:
+		stub = self._rollercoaster_stub()
+		request = self._registration_request()
+		return self._handle_registration(await stub.register_wagon(request))
+
+	def _depart(self, passenger_ids: list[int]) -> None:
+		self.current_passengers = passenger_ids
+		self._spawn(self._notify_arrival_async())
+
+	async def _notify_arrival_async(self) -> None:
+		await asyncio.sleep(self.ride_duration)
+		attempt = 0
+		while self.wagon_id is not None:
+			try:
+				print(f'Wagon {self.wagon_id} ride completed, notifying rollercoaster')
+				stub = self._rollercoaster_stub()
+				arrive_request = rollercoaster_pb2.arrive_request(
+					wagon_id=self.wagon_id, passenger_id=self.current_passengers
+				)
+				if (await stub.arrive(arrive_request)).success:
+					self.current_passengers = []
+					self.delayed_retry()
+					return
+			except grpc.aio.AioRpcError as e:
+				print(f'Failed to notify rollercoaster of arrival: {e}')
+
+			delay = self.arrival_backoff(attempt)
+			print(f'retrying arrival in {delay:.1f} seconds...')
+			await asyncio.sleep(delay)
+			attempt += 1
+
+
+class _AioWagonServicer(rollercoaster_pb2_grpc.wagonServicer):
+	def __init__(self, service: AioWagonService) -> None:
+		self.service = service
+
+	async def depart(self, request, context) -> empty_pb2.Empty:
+		self.service._depart(list(request.passenger_id))
+		return empty_pb2.Empty()
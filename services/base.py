@@ -1,20 +1,44 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from concurrent import futures
+from typing import Any
 
 import grpc
 
+from services.channel_pool import ChannelPool
+from services.clock import REAL_CLOCK, Clock
+from services.config import GrpcConfig
+
 
 class BaseService(ABC):
 	def __init__(self, host: str, port: int) -> None:
 		self.host = host
 		self.port = port
 		self.server: grpc.Server | None = None
+		self.channels = ChannelPool()
+		self.clock: Clock = REAL_CLOCK
+		self.config = GrpcConfig()
+		# Long-lived streams the sync server keeps open at once. Each holds a
+		# thread for as long as it lasts, so they get threads on top of
+		# max_workers rather than taking the ones unary calls need.
+		self.max_streams = 0
+
+	def configure(self, config: GrpcConfig) -> None:
+		# Takes effect for the next server started and channels opened
+		self.config = config
+		self.channels.options = config.channel_options()
 
 	def start_server(self) -> None:
 		if self.server is not None:
 			return
 
-		self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+		self.server = grpc.server(
+			futures.ThreadPoolExecutor(
+				max_workers=(self.config.max_workers or 10) + self.max_streams
+			),
+			options=self.config.server_options(),
+			maximum_concurrent_rpcs=self.config.maximum_concurrent_rpcs,
+		)
 		self._configure_server(self.server)
 		self.server.add_insecure_port(f'{self.host}:{self.port}')
 		self.server.start()
@@ -32,8 +56,10 @@ class BaseService(ABC):
 	def _configure_server(self, server: grpc.Server) -> None:
 		pass
 
-	def create_channel(self, target_host: str, target_port: int) -> grpc.Channel:
-		return grpc.insecure_channel(f'{target_host}:{target_port}')
+	def get_stub[T](
+		self, target_host: str, target_port: int, stub_type: Callable[[Any], T]
+	) -> T:
+		return self.channels.get_stub(target_host, target_port, stub_type)
 
 	@property
 	def address(self) -> str:
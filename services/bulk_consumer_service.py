@@ -0,0 +1,186 @@
+import threading
+from abc import abstractmethod
+from array import array
+from collections.abc import Sequence
+
+import grpc
+
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services.consumer_service import ConsumerService
+from services.scheduler import DueQueue
+
+BATCH_SIZE = 500
+
+
+class BulkConsumerService[Due](ConsumerService):
+	# Hosts many wagons or passengers behind one server and port. Entry i
+	# registers with slot=i, and its state is a column entry rather than an
+	# object: its coordinator ID in ids, plus whatever the subclass keeps.
+	# Work that comes due goes through one DueQueue, drained in bulk by a
+	# tick every tick_interval on one thread of its own.
+	noun = 'entries'
+	wagon = False
+
+	def __init__(
+		self,
+		host: str,
+		port: int,
+		rollercoaster_host: str = 'localhost',
+		rollercoaster_port: int = 50051,
+		subscribe: bool = False,
+		size: int = 100,
+	) -> None:
+		super().__init__(host, port, rollercoaster_host, rollercoaster_port, subscribe)
+		self.size = size
+		self.ids = array('i', [-1]) * size
+		self.rides = 0
+		self._slots: dict[int, int] = {}
+		self.tick_interval = 0.05
+		self._due: DueQueue[Due] = DueQueue()
+		self._ticker: threading.Thread | None = None
+		self._stopped = threading.Event()
+		# Seconds a bulk call may take before its batch is given up on
+		self.rpc_timeout = 5.0
+		self._lock = threading.Lock()
+
+	def register_with_rollercoaster(self) -> bool:
+		# Registers every entry that is idle; False if the coordinator could
+		# not be reached
+		registered = self._register(self._idle_slots())
+		if self._ticker is None:
+			self._ticker = threading.Thread(target=self._tick_loop, daemon=True)
+			self._ticker.start()
+		return registered
+
+	@abstractmethod
+	def _idle_slots(self) -> list[int]:
+		pass
+
+	def _slot_request(self, slot: int) -> rollercoaster_pb2.RegistrationRequest:
+		request = self._registration_request()
+		request.slot = slot
+		return request
+
+	@abstractmethod
+	def _send_registrations(
+		self,
+		stub: rollercoaster_pb2_grpc.rollercoasterStub,
+		batch: rollercoaster_pb2.RegistrationBatch,
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		pass
+
+	def _register(self, slots: list[int]) -> bool:
+		for start in range(0, len(slots), BATCH_SIZE):
+			batch = slots[start : start + BATCH_SIZE]
+			# Looked up per batch, as a batch can move us to another shard
+			stub = self._rollercoaster_stub()
+			try:
+				response = self._send_registrations(
+					stub,
+					rollercoaster_pb2.RegistrationBatch(
+						registrations=[self._slot_request(slot) for slot in batch]
+					),
+				)
+			except grpc.RpcError as e:
+				print(
+					f'Registering {len(slots) - start} {self.noun} failed: {e.code()}'
+				)
+				self._register_later(slots[start:])
+				return False
+			self._handle_registrations(batch, response.registrations)
+		return True
+
+	def _handle_registrations(
+		self,
+		slots: list[int],
+		responses: Sequence[rollercoaster_pb2.RegistrationResponse],
+	) -> None:
+		if responses and responses[0].no_wagons:
+			# Turned away before registering, so there is no lease yet
+			self._next_shard()
+		elif responses:
+			self._start_heartbeat(responses[0].lease_ms)
+		now = self.clock.now()
+		with self._lock:
+			for slot, response in zip(slots, responses, strict=True):
+				if not response.no_wagons:
+					self.ids[slot] = response.id
+					self._slots[response.id] = slot
+				if not response.success:
+					# Jittered like ConsumerService.retry_after
+					delay = (
+						response.retry_after_ms / 1000 * self.rng.uniform(0.75, 1.25)
+						if response.retry_after_ms > 0
+						else self.rng.uniform(*self.retry_delay)
+					)
+					self._due.push(now + delay, self._registration_due(slot))
+
+	@abstractmethod
+	def _registration_due(self, slot: int) -> Due:
+		pass
+
+	def _register_later(self, slots: list[int]) -> None:
+		now = self.clock.now()
+		for slot in slots:
+			self._due.push(
+				now + self.rng.uniform(*self.retry_delay), self._registration_due(slot)
+			)
+
+	def _tick_loop(self) -> None:
+		while not self._stopped.wait(self.tick_interval):
+			self._tick()
+
+	@abstractmethod
+	def _tick(self) -> None:
+		pass
+
+	def _heartbeat_request(self) -> rollercoaster_pb2.HeartbeatRequest | None:
+		with self._lock:
+			ids = list(self._slots)
+		if not ids:
+			return None
+		return rollercoaster_pb2.HeartbeatRequest(
+			id=ids[0], ids=ids[1:], wagon=self.wagon
+		)
+
+	def _leave_shard(self) -> None:
+		with self._lock:
+			self._slots.clear()
+			self.ids = array('i', [-1]) * self.size
+
+	def _lease_expired(self, response: rollercoaster_pb2.HeartbeatResponse) -> None:
+		with self._lock:
+			slots = []
+			for entry_id in response.unknown_ids:
+				slot = self._slots.pop(entry_id, None)
+				if slot is not None:
+					self.ids[slot] = -1
+					self._forget(slot)
+					slots.append(slot)
+		if slots:
+			print(f'{len(slots)} leases expired, registering again')
+			self._register_later(slots)
+
+	def _forget(self, slot: int) -> None:
+		# Caller holds self._lock; the coordinator no longer knows the slot
+		pass
+
+	def stop_server(self) -> None:
+		self._stopped.set()
+		super().stop_server()
+
+	@abstractmethod
+	def _busy(self) -> dict[str, int]:
+		pass
+
+	def get_status(self) -> dict[str, int | str]:
+		with self._lock:
+			status = {
+				self.noun: self.size,
+				'registered': len(self._slots),
+				**self._busy(),
+				'rides': self.rides,
+				'address': self.address,
+			}
+		print(status)
+		return status
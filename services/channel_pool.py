@@ -0,0 +1,98 @@
+import asyncio
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import grpc
+
+
+class _PoolEntry:
+	__slots__ = ('channel', 'stubs', 'last_used')
+
+	def __init__(self, channel: Any) -> None:
+		self.channel = channel
+		self.stubs: dict[Callable, object] = {}
+		self.last_used = 0.0
+
+
+class ChannelPool:
+	def __init__(
+		self,
+		max_channels: int = 256,
+		idle_timeout: float = 300.0,
+		channel_factory: Callable[..., Any] = grpc.insecure_channel,
+	) -> None:
+		# channel_factory lets the pool hold grpc.aio channels as well; it is
+		# called with the target and options
+		self.channel_factory = channel_factory
+		self.options: list[tuple[str, int]] = []
+		self.max_channels = max_channels
+		self.idle_timeout = idle_timeout
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries: OrderedDict[tuple[str, int], _PoolEntry] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get_stub[T](self, host: str, port: int, stub_type: Callable[[Any], T]) -> T:
+		key = (host, port)
+		now = time.monotonic()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				entry = _PoolEntry(
+					self.channel_factory(f'{host}:{port}', options=self.options)
+				)
+				self._entries[key] = entry
+			else:
+				self.hits += 1
+				self._entries.move_to_end(key)
+			entry.last_used = now
+			stub = entry.stubs.get(stub_type)
+			if stub is None:
+				stub = entry.stubs[stub_type] = stub_type(entry.channel)
+			self._evict(now)
+		return stub  # type: ignore[return-value]
+
+	def _evict(self, now: float) -> None:
+		# Entries are kept in LRU order, so only the front ever needs checking.
+		# An evicted channel is only dropped, not closed: another thread may
+		# still be calling through a stub it got earlier, and the channel
+		# closes itself once the last of those is gone.
+		while self._entries:
+			key, entry = next(iter(self._entries.items()))
+			if (
+				len(self._entries) <= self.max_channels
+				and now - entry.last_used < self.idle_timeout
+			):
+				break
+			del self._entries[key]
+			self.evictions += 1
+
+	def stats(self) -> dict[str, int]:
+		with self._lock:
+			return {
+				'channels': len(self._entries),
+				'hits': self.hits,
+				'misses': self.misses,
+				'evictions': self.evictions,
+			}
+
+	def drain(self) -> list[Any]:
+		with self._lock:
+			channels = [entry.channel for entry in self._entries.values()]
+			self._entries.clear()
+		return channels
+
+	def close(self) -> None:
+		for channel in self.drain():
+			self._close_channel(channel)
+
+	def _close_channel(self, channel: Any) -> None:
+		result = channel.close()
+		if inspect.isawaitable(result):
+			asyncio.ensure_future(result)
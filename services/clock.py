@@ -0,0 +1,67 @@
+import heapq
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+type Cancel = Callable[[], object]
+
+
+class Clock(ABC):
+	@abstractmethod
+	def now(self) -> float:
+		pass
+
+	@abstractmethod
+	def call_later(self, delay: float, callback: Callable[[], object]) -> Cancel:
+		pass
+
+
+class RealClock(Clock):
+	def now(self) -> float:
+		return time.monotonic()
+
+	def call_later(self, delay: float, callback: Callable[[], object]) -> Cancel:
+		timer = threading.Timer(delay, callback)
+		# Timers repeat for as long as a service runs, e.g. heartbeats, so
+		# they must not keep the process alive
+		timer.daemon = True
+		timer.start()
+		return timer.cancel
+
+
+class VirtualClock(Clock):
+	# Time only moves when run() pops the next timer, so a simulation takes
+	# as long as its callbacks do. Not thread-safe; everything runs in run().
+	def __init__(self, start: float = 0.0) -> None:
+		self._now = start
+		self._timers: list[tuple[float, int, Callable[[], object]]] = []
+		self._cancelled: set[int] = set()
+		self._sequence = itertools.count()
+
+	def now(self) -> float:
+		return self._now
+
+	def call_later(self, delay: float, callback: Callable[[], object]) -> Cancel:
+		# The sequence number keeps timers due at the same time in FIFO order
+		sequence = next(self._sequence)
+		heapq.heappush(self._timers, (self._now + max(delay, 0.0), sequence, callback))
+		return lambda: self._cancelled.add(sequence)
+
+	def run(self, until: float) -> int:
+		# Returns how many callbacks ran
+		ran = 0
+		while self._timers and self._timers[0][0] <= until:
+			when, sequence, callback = heapq.heappop(self._timers)
+			if sequence in self._cancelled:
+				self._cancelled.discard(sequence)
+				continue
+			self._now = when
+			callback()
+			ran += 1
+		self._now = max(self._now, until)
+		return ran
+
+
+REAL_CLOCK = RealClock()
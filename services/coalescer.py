@@ -0,0 +1,114 @@
+import threading
+from collections.abc import Callable, Iterable
+from concurrent import futures
+from dataclasses import dataclass, field
+
+type Endpoint = tuple[str, int]
+type CallLater = Callable[[float, Callable[[], object]], object]
+
+
+@dataclass(slots=True)
+class Batch:
+	passenger_ids: list[int] = field(default_factory=list)
+	# Finished by whoever sends the batch, once its call is over
+	done: futures.Future[None] = field(default_factory=futures.Future)
+
+	def settle(self, error: BaseException | None) -> None:
+		if error is None:
+			self.done.set_result(None)
+		else:
+			self.done.set_exception(error)
+
+
+class Coalescer:
+	# Gathers the passenger IDs bound for each endpoint over window seconds
+	# and hands every endpoint's to send in one batch, so a host serving
+	# many passengers gets one call rather than one per passenger. Everyone
+	# who added to a batch gets the same future back.
+	def __init__(
+		self,
+		send: Callable[[Endpoint, Batch], object],
+		call_later: CallLater,
+		window: float = 0.005,
+	) -> None:
+		self.window = window
+		self.batches = 0
+		self.notices = 0
+		self._send = send
+		self._call_later = call_later
+		self._pending: dict[Endpoint, Batch] = {}
+		self._lock = threading.Lock()
+
+	def add(
+		self, endpoint: Endpoint, passenger_ids: Iterable[int]
+	) -> futures.Future[None]:
+		with self._lock:
+			batch = self._pending.get(endpoint)
+			if batch is None:
+				if not self._pending:
+					self._call_later(self.window, self._flush)
+				batch = self._pending[endpoint] = Batch()
+			batch.passenger_ids.extend(passenger_ids)
+			return batch.done
+
+	def _flush(self) -> None:
+		with self._lock:
+			pending, self._pending = self._pending, {}
+			self.batches += len(pending)
+			self.notices += sum(len(batch.passenger_ids) for batch in pending.values())
+		for endpoint, batch in pending.items():
+			try:
+				self._send(endpoint, batch)
+			except Exception as e:
+				batch.settle(e)
+
+	def stats(self) -> dict[str, int]:
+		with self._lock:
+			return {'batches': self.batches, 'notices': self.notices}
+
+
+class FlushThread:
+	# A CallLater for coalescers that runs every callback from one
+	# long-lived thread, rather than a timer thread per window. A round
+	# opens with the first callback, waits out that callback's delay, then
+	# runs all it gathered.
+	def __init__(self) -> None:
+		self._callbacks: list[Callable[[], object]] = []
+		self._delay = 0.0
+		self._due = threading.Event()
+		self._stopped = threading.Event()
+		self._thread: threading.Thread | None = None
+		self._lock = threading.Lock()
+
+	def call_later(self, delay: float, callback: Callable[[], object]) -> None:
+		with self._lock:
+			if not self._callbacks:
+				self._delay = delay
+			self._callbacks.append(callback)
+			self._due.set()
+
+	def start(self) -> None:
+		self._thread = threading.Thread(
+			target=self._run, daemon=True, name='coalescer-flush'
+		)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stopped.set()
+		self._due.set()
+		if self._thread is not None:
+			self._thread.join(timeout=1)
+			self._thread = None
+
+	def _run(self) -> None:
+		while not self._stopped.is_set():
+			self._due.wait()
+			with self._lock:
+				delay = self._delay
+			self._stopped.wait(delay)
+			with self._lock:
+				callbacks, self._callbacks = self._callbacks, []
+				self._due.clear()
+			# Also runs what a stop cut short, so no batch is left unsettled
+			for callback in callbacks:
+				callback()
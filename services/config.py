@@ -0,0 +1,84 @@
+import argparse
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+# Core channel arguments shared by servers and client channels
+_SHARED_OPTIONS = {
+	'keepalive_time_ms': 'grpc.keepalive_time_ms',
+	'keepalive_timeout_ms': 'grpc.keepalive_timeout_ms',
+	'keepalive_permit_without_calls': 'grpc.keepalive_permit_without_calls',
+	'http2_max_pings_without_data': 'grpc.http2.max_pings_without_data',
+	'max_send_message_length': 'grpc.max_send_message_length',
+	'max_receive_message_length': 'grpc.max_receive_message_length',
+}
+_SERVER_OPTIONS = {
+	'max_concurrent_streams': 'grpc.max_concurrent_streams',
+	'http2_min_ping_interval_without_data_ms': (
+		'grpc.http2.min_ping_interval_without_data_ms'
+	),
+}
+
+
+@dataclass(slots=True)
+class GrpcConfig:
+	# None leaves the default in place: gRPC's own, or for max_workers 10
+	# threads for a server and 2 for an aio server's synchronous handlers
+	max_workers: int | None = None
+	maximum_concurrent_rpcs: int | None = None
+	max_concurrent_streams: int | None = None
+	keepalive_time_ms: int | None = None
+	keepalive_timeout_ms: int | None = None
+	keepalive_permit_without_calls: bool | None = None
+	http2_max_pings_without_data: int | None = None
+	http2_min_ping_interval_without_data_ms: int | None = None
+	max_send_message_length: int | None = None
+	max_receive_message_length: int | None = None
+
+	def _options(self, names: dict[str, str]) -> list[tuple[str, int]]:
+		return [
+			(option, int(value))
+			for name, option in names.items()
+			if (value := getattr(self, name)) is not None
+		]
+
+	def server_options(self) -> list[tuple[str, int]]:
+		return self._options(_SHARED_OPTIONS | _SERVER_OPTIONS)
+
+	def channel_options(self) -> list[tuple[str, int]]:
+		return self._options(_SHARED_OPTIONS)
+
+
+def load_config(path: Path) -> GrpcConfig:
+	# A TOML file with the GrpcConfig fields under [grpc]
+	import tomllib
+
+	with open(path, 'rb') as file:
+		values = tomllib.load(file).get('grpc', {})
+	names = {f.name for f in dataclasses.fields(GrpcConfig)}
+	unknown = set(values) - names
+	if unknown:
+		raise ValueError(f'{path}: unknown [grpc] settings {sorted(unknown)}')
+	return GrpcConfig(**values)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+	group = parser.add_argument_group('gRPC', 'override the --config file')
+	group.add_argument('--config', type=Path, help='TOML file with a [grpc] table')
+	for field in dataclasses.fields(GrpcConfig):
+		flag = '--' + field.name.replace('_', '-')
+		if field.name == 'keepalive_permit_without_calls':
+			group.add_argument(flag, action=argparse.BooleanOptionalAction)
+		else:
+			group.add_argument(flag, type=int, metavar='N')
+
+
+def from_args(args: argparse.Namespace) -> GrpcConfig:
+	config = load_config(args.config) if args.config else GrpcConfig()
+	overrides: dict[str, Any] = {
+		field.name: value
+		for field in dataclasses.fields(GrpcConfig)
+		if (value := getattr(args, field.name)) is not None
+	}
+	return dataclasses.replace(config, **overrides)
@@ -1,7 +1,12 @@
 import random
 import threading
+from collections.abc import Callable
 
+import grpc
+
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
 from services.base import BaseService
+from services.sharding import HashRing
 
 
 class ConsumerService(BaseService):
@@ -11,20 +16,167 @@ class ConsumerService(BaseService):
 		port: int,
 		rollercoaster_host: str = 'localhost',
 		rollercoaster_port: int = 50051,
+		subscribe: bool = False,
 	) -> None:
 		super().__init__(host, port)
 		self.rollercoaster_host = rollercoaster_host
 		self.rollercoaster_port = rollercoaster_port
-		self._shutdown_timer: threading.Timer | None = None
+		# With several coordinators, the ring decides which one owns us
+		self.shard_map: HashRing | None = None
+		# Shards passed over on the ring for having no wagons
+		self._shard_skip = 0
+		# Subscribed consumers get their events over one stream and need no server
+		self.subscribe = subscribe
+		# Seconds to wait before registering for another ride. Kept short;
+		# the coordinator says how long to back off when its queue is full.
+		self.retry_delay = (0.1, 0.5)
+		self.rng = random.Random()
+		self._events = None
+		self._event_thread: threading.Thread | None = None
+		# Seconds the coordinator remembers us without a heartbeat, 0 if it
+		# doesn't hand out leases
+		self.lease = 0.0
+		self._heartbeating = False
 
 	def delayed_retry(self) -> None:
-		delay = random.uniform(3.0, 7.0)
+		delay = self.rng.uniform(*self.retry_delay)
 		print(f're-registering in {delay:.1f} seconds...')
-		self._shutdown_timer = threading.Timer(delay, self.register_with_rollercoaster)
-		self._shutdown_timer.start()
+		self._call_later(delay, self._retry_registration)
+
+	def retry_after(
+		self, retry_after_ms: int, reason: str = 'rollercoaster is full'
+	) -> None:
+		# Jittered so clients turned away together don't all come back at once
+		delay = retry_after_ms / 1000 * self.rng.uniform(0.75, 1.25)
+		print(f'{reason}, re-registering in {delay:.1f} seconds...')
+		self._call_later(delay, self._retry_registration)
+
+	def _start_heartbeat(self, lease_ms: int) -> None:
+		self.lease = lease_ms / 1000
+		if self.lease > 0 and not self._heartbeating:
+			self._heartbeating = True
+			self._call_later(self.lease / 3, self._heartbeat)
+
+	def _heartbeat_request(self) -> rollercoaster_pb2.HeartbeatRequest | None:
+		# None while there is nothing registered to renew
+		...
+
+	def _heartbeat(self) -> None:
+		response = None
+		request = self._heartbeat_request()
+		try:
+			if request is not None:
+				response = self._rollercoaster_stub().heartbeat(
+					request, timeout=self.lease / 3
+				)
+		except grpc.RpcError as e:
+			print(f'Heartbeat failed: {e.code()}')
+		self._heartbeat_done(response)
+
+	def _heartbeat_done(
+		self, response: rollercoaster_pb2.HeartbeatResponse | None
+	) -> None:
+		# A failed heartbeat is retried on schedule; the lease outlasts a few
+		if not self._heartbeating:
+			return
+		if response is not None and not response.known:
+			self._lease_expired(response)
+		self._call_later(self.lease / 3, self._heartbeat)
+
+	def _lease_expired(self, response: rollercoaster_pb2.HeartbeatResponse) -> None:
+		print('lease expired, registering again')
+		self._retry_registration()
 
 	def delayed_shutdown(self) -> None:
 		print('shutting down ...')
-		threading.Timer(2.0, self.stop_server).start()
+		self._call_later(2.0, self.stop_server)
+
+	def _call_later(self, delay: float, callback: Callable[[], object]) -> None:
+		self.clock.call_later(delay, callback)
+
+	def _retry_registration(self) -> None:
+		self.register_with_rollercoaster()
 
 	def register_with_rollercoaster(self) -> bool: ...
+
+	@property
+	def coordinator(self) -> tuple[str, int]:
+		if self.shard_map is not None:
+			return self.shard_map.shard_for(self.host, self.port, self._shard_skip)
+		return self.rollercoaster_host, self.rollercoaster_port
+
+	def _next_shard(self) -> None:
+		# Called when our shard has no wagons; the next one on the ring gets
+		# a turn. Events come from the shard we register with, so a
+		# subscription moves along too.
+		if self.shard_map is None:
+			return
+		self._shard_skip += 1
+		self._leave_shard()
+		host, port = self.coordinator
+		print(f'no wagons on this shard, moving to {host}:{port}')
+		if self._events is not None:
+			events = self._events
+			self.open_subscription()
+			events.cancel()
+
+	def _leave_shard(self) -> None:
+		# Drops the IDs handed out by the shard we are leaving, which mean
+		# someone else on the next one
+		pass
+
+	def _rollercoaster_stub(self) -> rollercoaster_pb2_grpc.rollercoasterStub:
+		return self.get_stub(
+			*self.coordinator, rollercoaster_pb2_grpc.rollercoasterStub
+		)
+
+	def _registration_request(self) -> rollercoaster_pb2.RegistrationRequest:
+		return rollercoaster_pb2.RegistrationRequest(host=self.host, port=self.port)
+
+	def open_subscription(self) -> None:
+		stub = self._rollercoaster_stub()
+		self._events = stub.subscribe(self._registration_request())
+		try:
+			# Wait for the coordinator to confirm before registering for a ride
+			next(self._events)
+		except grpc.RpcError as e:
+			if e.code() != grpc.StatusCode.RESOURCE_EXHAUSTED:
+				raise
+			self._events = None
+			self._take_calls(e.details())
+			self.start_server()
+			return
+		print('subscribed to rollercoaster events')
+		self._event_thread = threading.Thread(target=self._consume_events, daemon=True)
+		self._event_thread.start()
+
+	def _take_calls(self, reason: str | None) -> None:
+		# A coordinator out of stream slots can still call us back
+		print(f'subscription turned away ({reason}), serving on {self.address}')
+		self.subscribe = False
+
+	def _consume_events(self) -> None:
+		assert self._events is not None
+		try:
+			for event in self._events:
+				self._handle_event(event)
+		except grpc.RpcError as e:
+			if e.code() != grpc.StatusCode.CANCELLED:
+				print(f'Event stream closed: {e}')
+
+	def _handle_event(self, event: rollercoaster_pb2.Event) -> None: ...
+
+	def stop_server(self) -> None:
+		self._heartbeating = False
+		if self._events is not None:
+			self._events.cancel()
+		super().stop_server()
+
+	def wait_for_termination(self) -> None:
+		# Moving shards swaps in a new event thread before the old one ends
+		while self.server is None and self._event_thread is not None:
+			thread = self._event_thread
+			thread.join()
+			if thread is self._event_thread:
+				break
+		super().wait_for_termination()
@@ -0,0 +1,373 @@
+import contextlib
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+# Record kinds. Each one is a state transition of the coordinator, applied
+# in log order on top of the latest snapshot.
+WAGON = 1
+PASSENGER = 2
+RIDE = 3
+ARRIVAL = 4
+REQUEUE = 5
+REQUEUE_WAGON = 6
+DISCARD = 7
+EXPIRE_WAGON = 8
+EXPIRE_PASSENGER = 9
+
+_FRAME = struct.Struct('<BII')  # kind, body length, crc32 of the body
+_REGISTRATION = struct.Struct('<iiiH')  # id, port, extra, host length
+_SLOT = struct.Struct('<i')  # after the host, only if not 0
+_IDS = struct.Struct('<iI')  # wagon id, passenger count
+_SNAPSHOT_HEADER = struct.Struct('<4sHI')  # magic, version, next log number
+_COUNT = struct.Struct('<I')
+_MAGIC = b'RCSN'
+_VERSION = 4
+
+
+def _int_bytes(values: Iterable[int]) -> bytes:
+	ints = array('i', values)
+	if sys.byteorder == 'big':
+		ints.byteswap()
+	return ints.tobytes()
+
+
+def encode_registration(
+	entry_id: int, host: str, port: int, extra: int, slot: int = 0
+) -> bytes:
+	# extra is the capacity for wagons and whether it queued for passengers
+	encoded = host.encode()
+	body = _REGISTRATION.pack(entry_id, port, extra, len(encoded)) + encoded
+	return body + _SLOT.pack(slot) if slot else body
+
+
+def decode_registration(body: memoryview) -> tuple[int, str, int, int, int]:
+	# Returns the ID, host, port, extra and slot
+	entry_id, port, extra, length = _REGISTRATION.unpack_from(body)
+	start = _REGISTRATION.size
+	host = str(body[start : start + length], 'utf-8')
+	slot = 0
+	if len(body) >= start + length + _SLOT.size:
+		(slot,) = _SLOT.unpack_from(body, start + length)
+	return entry_id, host, port, extra, slot
+
+
+def encode_ids(wagon_id: int, passenger_ids: list[int]) -> bytes:
+	return _IDS.pack(wagon_id, len(passenger_ids)) + _int_bytes(passenger_ids)
+
+
+def decode_ids(body: memoryview) -> tuple[int, list[int]]:
+	wagon_id, count = _IDS.unpack_from(body)
+	return wagon_id, _read_ints(body, _IDS.size, count)
+
+
+def _read_ints(buffer: memoryview, offset: int, count: int) -> list[int]:
+	ints = array('i')
+	ints.frombytes(buffer[offset : offset + 4 * count])
+	if sys.byteorder == 'big':
+		ints.byteswap()
+	return ints.tolist()
+
+
+@dataclass(slots=True)
+class CoordinatorState:
+	wagons: dict[int, tuple[str, int]]
+	wagon_next_id: int
+	wagon_capacity: dict[int, int]
+	passengers: dict[int, tuple[str, int]]
+	passenger_next_id: int
+	waiting_wagons: list[int]
+	waiting_passengers: list[int]
+	wagon_order: list[int]
+	wagon_slots: dict[int, int] = field(default_factory=dict)
+	passenger_slots: dict[int, int] = field(default_factory=dict)
+	riding: dict[int, list[list[int]]] = field(default_factory=dict)
+	early_arrivals: dict[int, list[list[int]]] = field(default_factory=dict)
+	# Released by a recovery, still to be told to disembark
+	recovered: list[int] = field(default_factory=list)
+
+
+class _Writer:
+	def __init__(self) -> None:
+		self.parts: list[bytes] = []
+
+	def count(self, value: int) -> None:
+		self.parts.append(_COUNT.pack(value))
+
+	def ints(self, values: list[int]) -> None:
+		self.count(len(values))
+		self.parts.append(_int_bytes(values))
+
+
+class _Reader:
+	def __init__(self, buffer: memoryview, offset: int) -> None:
+		self.buffer = buffer
+		self.offset = offset
+
+	def count(self) -> int:
+		(value,) = _COUNT.unpack_from(self.buffer, self.offset)
+		self.offset += _COUNT.size
+		return value
+
+	def ints(self) -> list[int]:
+		count = self.count()
+		values = _read_ints(self.buffer, self.offset, count)
+		self.offset += 4 * count
+		return values
+
+
+def encode_snapshot(state: CoordinatorState, next_log: int) -> bytes:
+	# Hosts are stored once and referred to by index; everything else is
+	# columns of int32 so loading is a handful of array copies
+	hosts: dict[str, int] = {}
+	for host, _ in (*state.wagons.values(), *state.passengers.values()):
+		hosts.setdefault(host, len(hosts))
+	writer = _Writer()
+	writer.count(len(hosts))
+	for host in hosts:
+		encoded = host.encode()
+		writer.count(len(encoded))
+		writer.parts.append(encoded)
+	for entries, next_id, slots in (
+		(state.wagons, state.wagon_next_id, state.wagon_slots),
+		(state.passengers, state.passenger_next_id, state.passenger_slots),
+	):
+		writer.count(next_id)
+		writer.ints(list(entries))
+		writer.ints([hosts[host] for host, _ in entries.values()])
+		writer.ints([port for _, port in entries.values()])
+		writer.ints([slots.get(entry_id, 0) for entry_id in entries])
+	writer.ints([state.wagon_capacity.get(wid, 0) for wid in state.wagons])
+	writer.ints(state.waiting_wagons)
+	writer.ints(state.waiting_passengers)
+	writer.ints(state.wagon_order)
+	for rides in (state.riding, state.early_arrivals):
+		writer.count(len(rides))
+		for wagon_id, passenger_lists in rides.items():
+			writer.count(wagon_id)
+			writer.count(len(passenger_lists))
+			for passenger_ids in passenger_lists:
+				writer.ints(passenger_ids)
+	writer.ints(state.recovered)
+	header = _SNAPSHOT_HEADER.pack(_MAGIC, _VERSION, next_log)
+	return header + b''.join(writer.parts)
+
+
+def decode_snapshot(buffer: memoryview) -> tuple[CoordinatorState, int]:
+	magic, version, next_log = _SNAPSHOT_HEADER.unpack_from(buffer)
+	if magic != _MAGIC or version != _VERSION:
+		raise ValueError(f'not a version {_VERSION} snapshot')
+	reader = _Reader(buffer, _SNAPSHOT_HEADER.size)
+	hosts = []
+	for _ in range(reader.count()):
+		length = reader.count()
+		hosts.append(str(buffer[reader.offset : reader.offset + length], 'utf-8'))
+		reader.offset += length
+	registries = []
+	for _ in range(2):
+		next_id = reader.count()
+		ids, host_indexes, ports = reader.ints(), reader.ints(), reader.ints()
+		slots = reader.ints()
+		entries = {
+			entry_id: (hosts[index], port)
+			for entry_id, index, port in zip(ids, host_indexes, ports, strict=True)
+		}
+		slotted = {
+			entry_id: slot for entry_id, slot in zip(ids, slots, strict=True) if slot
+		}
+		registries.append((entries, next_id, slotted))
+	wagons, wagon_next_id, wagon_slots = registries[0]
+	passengers, passenger_next_id, passenger_slots = registries[1]
+	capacities = reader.ints()
+	state = CoordinatorState(
+		wagons=wagons,
+		wagon_next_id=wagon_next_id,
+		wagon_capacity=dict(zip(wagons, capacities, strict=True)),
+		passengers=passengers,
+		passenger_next_id=passenger_next_id,
+		waiting_wagons=reader.ints(),
+		waiting_passengers=reader.ints(),
+		wagon_order=reader.ints(),
+		wagon_slots=wagon_slots,
+		passenger_slots=passenger_slots,
+	)
+	for rides in (state.riding, state.early_arrivals):
+		for _ in range(reader.count()):
+			wagon_id = reader.count()
+			rides[wagon_id] = [reader.ints() for _ in range(reader.count())]
+	state.recovered = reader.ints()
+	return state, next_log
+
+
+@contextlib.contextmanager
+def _mapped(path: Path) -> Iterator[memoryview]:
+	with open(path, 'rb') as file:
+		if os.fstat(file.fileno()).st_size == 0:
+			yield memoryview(b'')
+			return
+		with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+			view = memoryview(mapped)
+			try:
+				yield view
+			finally:
+				view.release()
+
+
+def _read_log(path: Path) -> tuple[list[tuple[int, bytes]], int]:
+	# Returns the intact records and where they end; anything after that is
+	# a write that was torn by a crash
+	records = []
+	offset = 0
+	with _mapped(path) as buffer:
+		while offset + _FRAME.size <= len(buffer):
+			kind, length, crc = _FRAME.unpack_from(buffer, offset)
+			start = offset + _FRAME.size
+			body = bytes(buffer[start : start + length])
+			if len(body) < length or zlib.crc32(body) != crc:
+				break
+			records.append((kind, body))
+			offset = start + length
+	return records, offset
+
+
+class Journal:
+	# Appends go to an in-memory buffer that a background thread writes and
+	# fsyncs every sync_interval, so a crash loses at most that much. Once
+	# snapshot_every records have piled up, on_snapshot_due is called from
+	# the same thread.
+	def __init__(
+		self,
+		directory: Path,
+		sync_interval: float = 0.01,
+		snapshot_every: int = 100_000,
+	) -> None:
+		self.directory = directory
+		self.sync_interval = sync_interval
+		self.snapshot_every = snapshot_every
+		self.on_snapshot_due: Callable[[], object] | None = None
+		self.log_number = 0
+		self._records = 0
+		self._buffer = bytearray()
+		self._file: BinaryIO | None = None
+		self._lock = threading.Lock()
+		# Held from taking the buffer until it is on disk, so buffers are
+		# written in the order they were taken
+		self._io_lock = threading.Lock()
+		self._stopped = threading.Event()
+		self._flusher: threading.Thread | None = None
+
+	@property
+	def snapshot_path(self) -> Path:
+		return self.directory / 'snapshot'
+
+	def _log_path(self, number: int) -> Path:
+		return self.directory / f'log-{number:08d}'
+
+	def _log_numbers(self) -> list[int]:
+		return sorted(
+			int(path.name.removeprefix('log-')) for path in self.directory.glob('log-*')
+		)
+
+	def recover(self) -> tuple[CoordinatorState | None, list[tuple[int, bytes]]]:
+		self.directory.mkdir(parents=True, exist_ok=True)
+		state = None
+		next_log = 0
+		if self.snapshot_path.exists():
+			with _mapped(self.snapshot_path) as buffer:
+				state, next_log = decode_snapshot(buffer)
+		records = []
+		numbers = [n for n in self._log_numbers() if n >= next_log]
+		for number in numbers:
+			path = self._log_path(number)
+			log_records, end = _read_log(path)
+			records.extend(log_records)
+			if end < path.stat().st_size:
+				print(f'{path.name}: dropping a torn record at byte {end}')
+				os.truncate(path, end)
+				# Anything in later logs came after the gap
+				for later in numbers[numbers.index(number) + 1 :]:
+					self._log_path(later).unlink()
+				numbers = numbers[: numbers.index(number) + 1]
+				break
+		self.log_number = numbers[-1] if numbers else next_log
+		self._records = len(records)
+		return state, records
+
+	def open(self) -> None:
+		self._file = open(self._log_path(self.log_number), 'ab')  # noqa: SIM115
+		self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+		self._flusher.start()
+
+	def append(self, kind: int, body: bytes) -> None:
+		with self._lock:
+			self._buffer += _FRAME.pack(kind, len(body), zlib.crc32(body))
+			self._buffer += body
+			self._records += 1
+
+	def flush(self) -> None:
+		with self._io_lock:
+			with self._lock:
+				data, self._buffer = self._buffer, bytearray()
+				file = self._file
+			if file is not None and data:
+				file.write(data)
+				file.flush()
+				os.fsync(file.fileno())
+
+	def _flush_loop(self) -> None:
+		while not self._stopped.wait(self.sync_interval):
+			self.flush()
+			if self._records >= self.snapshot_every and self.on_snapshot_due:
+				self.on_snapshot_due()
+
+	def rotate(self) -> int:
+		# Starts a new log and returns its number. The caller must make sure
+		# nothing is appended between capturing its state and calling this.
+		with self._io_lock:
+			with self._lock:
+				data, self._buffer = self._buffer, bytearray()
+				previous = self._file
+				self.log_number += 1
+				self._file = open(self._log_path(self.log_number), 'ab')  # noqa: SIM115
+				self._records = 0
+			if previous is not None:
+				previous.write(data)
+				previous.flush()
+				os.fsync(previous.fileno())
+				previous.close()
+		return self.log_number
+
+	def write_snapshot(self, state: CoordinatorState, next_log: int) -> None:
+		temporary = self.snapshot_path.with_suffix('.tmp')
+		with open(temporary, 'wb') as file:
+			file.write(encode_snapshot(state, next_log))
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(temporary, self.snapshot_path)
+		directory = os.open(self.directory, os.O_RDONLY)
+		try:
+			os.fsync(directory)
+		finally:
+			os.close(directory)
+		# Only now is it safe to drop what the snapshot replaces
+		for number in self._log_numbers():
+			if number < next_log:
+				self._log_path(number).unlink()
+
+	def close(self) -> None:
+		self._stopped.set()
+		if self._flusher is not None:
+			self._flusher.join()
+		self.flush()
+		with self._lock:
+			file, self._file = self._file, None
+		if file is not None:
+			file.close()
@@ -0,0 +1,49 @@
+import heapq
+import math
+from array import array
+
+
+class Leases:
+	# Deadlines are a column indexed by ID. A renewal files the ID under the
+	# bucket of resolution seconds its deadline falls in; buckets are only
+	# looked at once they have passed, and IDs renewed since are skipped
+	# then. That is a few bytes per renewal rather than a heap entry, at the
+	# price of expiring up to resolution late.
+	def __init__(self, resolution: float = 0.1) -> None:
+		self.resolution = resolution
+		self._deadlines = array('d')
+		self._buckets: dict[int, array] = {}
+		self._bucket_order: list[int] = []
+
+	def renew(self, entry_id: int, deadline: float) -> None:
+		missing = entry_id + 1 - len(self._deadlines)
+		if missing > 0:
+			self._deadlines.extend(array('d', [math.inf]) * missing)
+		self._deadlines[entry_id] = deadline
+		self._file(entry_id, math.floor(deadline / self.resolution))
+
+	def _file(self, entry_id: int, bucket: int) -> None:
+		ids = self._buckets.get(bucket)
+		if ids is None:
+			ids = self._buckets[bucket] = array('i')
+			heapq.heappush(self._bucket_order, bucket)
+		ids.append(entry_id)
+
+	def expired(self, now: float) -> list[int]:
+		# Each lease comes up once and is gone afterwards
+		expired = []
+		order = self._bucket_order
+		while order and (order[0] + 1) * self.resolution <= now:
+			bucket = heapq.heappop(order)
+			for entry_id in self._buckets.pop(bucket):
+				deadline = self._deadlines[entry_id]
+				if deadline <= now:
+					self._deadlines[entry_id] = math.inf
+					expired.append(entry_id)
+				elif (
+					deadline != math.inf
+					and math.floor(deadline / self.resolution) <= bucket
+				):
+					# Rounding put it in a bucket that ends before it does
+					self._file(entry_id, bucket + 1)
+		return expired
@@ -0,0 +1,187 @@
+import bisect
+import itertools
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+
+
+class Counter:
+	kind = 'counter'
+
+	def __init__(self, name: str, help: str) -> None:
+		self.name = name
+		self.help = help
+		self.value = 0
+		self._lock = threading.Lock()
+
+	def inc(self, amount: int = 1) -> None:
+		with self._lock:
+			self.value += amount
+
+	def samples(self) -> Iterator[tuple[str, float]]:
+		yield self.name, self.value
+
+
+class Gauge:
+	# Read at scrape time, so keeping it current costs the hot path nothing
+	kind = 'gauge'
+
+	def __init__(self, name: str, help: str, read: Callable[[], float]) -> None:
+		self.name = name
+		self.help = help
+		self.read = read
+
+	def samples(self) -> Iterator[tuple[str, float]]:
+		yield self.name, self.read()
+
+
+class CounterView(Gauge):
+	# A counter that something else already keeps, e.g. the channel pool
+	kind = 'counter'
+
+
+class Histogram:
+	kind = 'histogram'
+
+	def __init__(self, name: str, help: str, bounds: Sequence[float]) -> None:
+		self.name = name
+		self.help = help
+		self.bounds = tuple(bounds)
+		self.counts = [0] * (len(self.bounds) + 1)
+		self.sum = 0.0
+		self.count = 0
+		self._lock = threading.Lock()
+
+	def observe(self, value: float) -> None:
+		index = bisect.bisect_left(self.bounds, value)
+		with self._lock:
+			self.counts[index] += 1
+			self.sum += value
+			self.count += 1
+
+	def snapshot(self) -> tuple[list[int], float, int]:
+		with self._lock:
+			return self.counts.copy(), self.sum, self.count
+
+	def cumulative(self) -> list[int]:
+		counts, _, _ = self.snapshot()
+		return list(itertools.accumulate(counts))
+
+	def quantile(self, q: float) -> float:
+		# Upper bound of the bucket holding the q-th observation
+		cumulative = self.cumulative()
+		if cumulative[-1] == 0:
+			return 0.0
+		rank = q * cumulative[-1]
+		index = bisect.bisect_left(cumulative, rank)
+		return self.bounds[index] if index < len(self.bounds) else float('inf')
+
+	def samples(self) -> Iterator[tuple[str, float]]:
+		# Buckets, sum and count all from one snapshot, so they agree
+		counts, total, count = self.snapshot()
+		cumulative = list(itertools.accumulate(counts))
+		for bound, bucket in zip(self.bounds, cumulative, strict=False):
+			yield f'{self.name}_bucket{{le="{bound:g}"}}', bucket
+		yield f'{self.name}_bucket{{le="+Inf"}}', count
+		yield f'{self.name}_sum', total
+		yield f'{self.name}_count', count
+
+
+class RateMeter:
+	# Events per second over a sliding window of one-second buckets
+	def __init__(
+		self, window: int = 60, now: Callable[[], float] = time.monotonic
+	) -> None:
+		self.window = window
+		self.now = now
+		self._buckets = [0] * window
+		self._seconds = [0] * window
+		self._lock = threading.Lock()
+
+	def mark(self, amount: int = 1) -> None:
+		second = int(self.now())
+		slot = second % self.window
+		with self._lock:
+			if self._seconds[slot] != second:
+				self._seconds[slot] = second
+				self._buckets[slot] = 0
+			self._buckets[slot] += amount
+
+	def rate(self) -> float:
+		now = int(self.now())
+		with self._lock:
+			total = sum(
+				count
+				for count, second in zip(self._buckets, self._seconds, strict=True)
+				if now - second < self.window
+			)
+		return total / self.window
+
+
+type Metric = Counter | Gauge | Histogram
+
+
+class MetricsRegistry:
+	def __init__(self) -> None:
+		self.metrics: list[Metric] = []
+
+	def counter(self, name: str, help: str) -> Counter:
+		return self._add(Counter(name, help))
+
+	def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+		return self._add(Gauge(name, help, read))
+
+	def counter_view(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+		return self._add(CounterView(name, help, read))
+
+	def histogram(self, name: str, help: str, bounds: Sequence[float]) -> Histogram:
+		return self._add(Histogram(name, help, bounds))
+
+	def _add[M: Metric](self, metric: M) -> M:
+		self.metrics.append(metric)
+		return metric
+
+	def render_prometheus(self) -> str:
+		lines = []
+		for metric in self.metrics:
+			lines.append(f'# HELP {metric.name} {metric.help}')
+			lines.append(f'# TYPE {metric.name} {metric.kind}')
+			lines.extend(f'{name} {_format(value)}' for name, value in metric.samples())
+		return '\n'.join(lines) + '\n'
+
+
+def _format(value: float) -> str:
+	# Exact, so counters past a million still diff right
+	if isinstance(value, int):
+		return str(value)
+	if not math.isfinite(value):
+		return {'inf': '+Inf', '-inf': '-Inf'}.get(repr(value), 'NaN')
+	return str(int(value)) if value.is_integer() else repr(value)
+
+
+def serve_prometheus(
+	registry: MetricsRegistry, host: str, port: int
+) -> Callable[[], None]:
+	# Returns a function that stops serving. http.server is only loaded by
+	# coordinators that export metrics.
+	from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+	class Handler(BaseHTTPRequestHandler):
+		def do_GET(self) -> None:
+			if self.path != '/metrics':
+				self.send_error(404)
+				return
+			body = registry.render_prometheus().encode()
+			self.send_response(200)
+			self.send_header('Content-Type', 'text/plain; version=0.0.4')
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format: str, *args: object) -> None:
+			pass
+
+	server = ThreadingHTTPServer((host, port), Handler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server.shutdown
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent import futures
+
+
+class Notifier:
+	# Fire-and-forget delivery of outbound notifications. Every attempt gets its
+	# own deadline; failed attempts are retried with backoff and only counted.
+	def __init__(
+		self,
+		max_workers: int = 16,
+		timeout: float = 2.0,
+		attempts: int = 3,
+		backoff: float = 0.2,
+	) -> None:
+		self.max_workers = max_workers
+		self.timeout = timeout
+		self.attempts = attempts
+		self.backoff = backoff
+		self.sent = 0
+		self.retried = 0
+		self.failed = 0
+		self._executor: futures.ThreadPoolExecutor | None = None
+		self._closed = False
+		self._lock = threading.Lock()
+
+	def submit(self, call: Callable[[float], object]) -> None:
+		with self._lock:
+			if self._closed:
+				# Shut down; the call is dropped rather than starting a new pool
+				self.failed += 1
+				return
+			if self._executor is None:
+				self._executor = futures.ThreadPoolExecutor(
+					max_workers=self.max_workers, thread_name_prefix='notify'
+				)
+			executor = self._executor
+		executor.submit(self._deliver, call)
+
+	def _deliver(self, call: Callable[[float], object]) -> None:
+		for attempt in range(self.attempts):
+			try:
+				call(self.timeout)
+				self._count(sent=1)
+				return
+			except Exception as e:
+				if not self._should_retry(attempt, e):
+					return
+			# Backing off on the worker is fine, retries are the rare path
+			time.sleep(self.backoff * 2**attempt)
+
+	async def deliver_async(self, call: Callable[[float], Awaitable[object]]) -> None:
+		for attempt in range(self.attempts):
+			try:
+				await call(self.timeout)
+				self._count(sent=1)
+				return
+			except Exception as e:
+				if not self._should_retry(attempt, e):
+					return
+			await asyncio.sleep(self.backoff * 2**attempt)
+
+	def _should_retry(self, attempt: int, error: Exception) -> bool:
+		if attempt + 1 < self.attempts:
+			self._count(retried=1)
+			return True
+		self._count(failed=1)
+		print(f'Notification failed after {self.attempts} attempts: {error}')
+		return False
+
+	def _count(self, sent: int = 0, retried: int = 0, failed: int = 0) -> None:
+		with self._lock:
+			self.sent += sent
+			self.retried += retried
+			self.failed += failed
+
+	def stats(self) -> dict[str, int]:
+		with self._lock:
+			return {'sent': self.sent, 'retried': self.retried, 'failed': self.failed}
+
+	def shutdown(self) -> None:
+		with self._lock:
+			self._closed = True
+			executor, self._executor = self._executor, None
+		if executor is not None:
+			executor.shutdown(wait=False)
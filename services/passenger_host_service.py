@@ -0,0 +1,104 @@
+from collections.abc import Iterable
+
+import grpc
+from google.protobuf import empty_pb2
+
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services.bulk_consumer_service import BulkConsumerService
+
+
+class PassengerHostService(
+	BulkConsumerService[int], rollercoaster_pb2_grpc.passengerServicer
+):
+	# Hosts a crowd of passengers behind one server and port. Besides its ID,
+	# a passenger's state is whether it is riding, in on_ride. Due items are
+	# the slots due to register again.
+	noun = 'passengers'
+
+	def __init__(
+		self,
+		host: str,
+		port: int,
+		rollercoaster_host: str = 'localhost',
+		rollercoaster_port: int = 50051,
+		subscribe: bool = False,
+		passengers: int = 1000,
+	) -> None:
+		super().__init__(
+			host, port, rollercoaster_host, rollercoaster_port, subscribe, passengers
+		)
+		self.on_ride = bytearray(passengers)
+
+	def _configure_server(self, server: grpc.Server) -> None:
+		rollercoaster_pb2_grpc.add_passengerServicer_to_server(self, server)
+
+	def _idle_slots(self) -> list[int]:
+		# Neither riding nor waiting to retry
+		due = set(self._due)
+		with self._lock:
+			return [
+				slot
+				for slot in range(self.size)
+				if not self.on_ride[slot] and slot not in due
+			]
+
+	def _send_registrations(
+		self,
+		stub: rollercoaster_pb2_grpc.rollercoasterStub,
+		batch: rollercoaster_pb2.RegistrationBatch,
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		return stub.register_passengers_bulk(batch, timeout=self.rpc_timeout)
+
+	def _registration_due(self, slot: int) -> int:
+		return slot
+
+	def _tick(self) -> None:
+		slots = self._due.pop_due(self.clock.now())
+		if slots:
+			self._register(slots)
+
+	def _forget(self, slot: int) -> None:
+		self.on_ride[slot] = 0
+
+	def i_am_boarding(self, request, context) -> empty_pb2.Empty:
+		self._board([request.passenger_id])
+		return empty_pb2.Empty()
+
+	def i_am_disembarking(self, request, context) -> empty_pb2.Empty:
+		self._disembark([request.passenger_id])
+		return empty_pb2.Empty()
+
+	def i_am_boarding_bulk(self, request, context) -> empty_pb2.Empty:
+		self._board(request.passenger_id)
+		return empty_pb2.Empty()
+
+	def i_am_disembarking_bulk(self, request, context) -> empty_pb2.Empty:
+		self._disembark(request.passenger_id)
+		return empty_pb2.Empty()
+
+	def _board(self, passenger_ids: Iterable[int]) -> None:
+		with self._lock:
+			for pid in passenger_ids:
+				slot = self._slots.get(pid)
+				if slot is not None:
+					self.on_ride[slot] = 1
+
+	def _disembark(self, passenger_ids: Iterable[int]) -> None:
+		slots = []
+		with self._lock:
+			for pid in passenger_ids:
+				slot = self._slots.get(pid)
+				if slot is not None:
+					self.on_ride[slot] = 0
+					slots.append(slot)
+			self.rides += len(slots)
+		self._register_later(slots)
+
+	def _handle_event(self, event: rollercoaster_pb2.Event) -> None:
+		if event.kind == rollercoaster_pb2.Event.BOARDING:
+			self._board(event.passenger_id)
+		elif event.kind == rollercoaster_pb2.Event.DISEMBARKING:
+			self._disembark(event.passenger_id)
+
+	def _busy(self) -> dict[str, int]:
+		return {'on_ride': sum(self.on_ride)}
@@ -12,10 +12,9 @@ class PassengerService(ConsumerService, rollercoaster_pb2_grpc.passengerServicer
 		port: int,
 		rollercoaster_host: str = 'localhost',
 		rollercoaster_port: int = 50051,
+		subscribe: bool = False,
 	) -> None:
-		super().__init__(host, port)
-		self.rollercoaster_host = rollercoaster_host
-		self.rollercoaster_port = rollercoaster_port
+		super().__init__(host, port, rollercoaster_host, rollercoaster_port, subscribe)
 		self.passenger_id: int | None = None
 		self.is_on_ride = False
 
@@ -23,29 +22,69 @@ class PassengerService(ConsumerService, rollercoaster_pb2_grpc.passengerServicer
 		rollercoaster_pb2_grpc.add_passengerServicer_to_server(self, server)
 
 	def register_with_rollercoaster(self) -> bool:
-		channel = self.create_channel(self.rollercoaster_host, self.rollercoaster_port)
-		stub = rollercoaster_pb2_grpc.rollercoasterStub(channel)
-		request = rollercoaster_pb2.RegistrationRequest(host=self.host, port=self.port)
-		response = stub.register_passenger(request)
-		channel.close()
+		stub = self._rollercoaster_stub()
+		request = self._registration_request()
+		return self._handle_registration(stub.register_passenger(request))
 
+	def _handle_registration(
+		self, response: rollercoaster_pb2.RegistrationResponse
+	) -> bool:
+		if response.no_wagons:
+			# Turned away before registering, so there is no lease yet
+			self._next_shard()
+			self.retry_after(response.retry_after_ms, 'no wagons')
+			return True
+		self._start_heartbeat(response.lease_ms)
 		if response.success:
 			self.passenger_id = response.id
 			print(f'Passenger registered successfully with ID {response.id}')
 			return True
+		if response.retry_after_ms > 0:
+			self.passenger_id = response.id
+			self.retry_after(response.retry_after_ms)
+			return True
 		print('Passenger registration failed')
 		return False
 
+	def _heartbeat_request(self) -> rollercoaster_pb2.HeartbeatRequest | None:
+		if self.passenger_id is None:
+			return None
+		return rollercoaster_pb2.HeartbeatRequest(id=self.passenger_id)
+
+	def _leave_shard(self) -> None:
+		self.passenger_id = None
+
 	def i_am_boarding(self, request, context) -> empty_pb2.Empty:
-		self.is_on_ride = True
-		print('boarding')
+		self._board()
 		return empty_pb2.Empty()
 
 	def i_am_disembarking(self, request, context) -> empty_pb2.Empty:
+		self._disembark()
+		return empty_pb2.Empty()
+
+	def i_am_boarding_bulk(self, request, context) -> empty_pb2.Empty:
+		# Every ID in it is this passenger's
+		self._board()
+		return empty_pb2.Empty()
+
+	def i_am_disembarking_bulk(self, request, context) -> empty_pb2.Empty:
+		self._disembark()
+		return empty_pb2.Empty()
+
+	def _board(self) -> None:
+		self.is_on_ride = True
+		print('boarding')
+
+	def _disembark(self) -> None:
 		self.is_on_ride = False
 		print('disembarking')
 		self.delayed_retry()
-		return empty_pb2.Empty()
+
+	def _handle_event(self, event: rollercoaster_pb2.Event) -> None:
+		if event.kind == rollercoaster_pb2.Event.BOARDING:
+			self._board()
+		elif event.kind == rollercoaster_pb2.Event.DISEMBARKING:
+			self._disembark()
 
 	def get_status(self) -> dict[str, int | None | bool | str]:
 		status = {
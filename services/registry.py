@@ -0,0 +1,142 @@
+import math
+from array import array
+from collections.abc import Iterable, Iterator
+
+
+class Registry:
+	# Entries are rows of int32 columns indexed by ID, which are handed out
+	# densely. Hosts are interned since most entries share a few of them, so
+	# an entry costs its columns and one lookup key rather than a tuple and
+	# a host string.
+	def __init__(self) -> None:
+		self._hosts: list[str] = []
+		self._host_index: dict[str, int] = {}
+		self._host = array('i')  # index into _hosts, -1 for no entry
+		self._port = array('i')
+		self._slot = array('i')
+		# The host index, port and slot packed into one int, to find an ID
+		self._ids: dict[int, int] = {}
+		self._count = 0
+		# IDs are never handed out twice, even after an entry is removed
+		self.next_id = 0
+
+	@staticmethod
+	def _key(host_index: int, port: int, slot: int) -> int:
+		return host_index << 64 | (port & 0xFFFFFFFF) << 32 | slot & 0xFFFFFFFF
+
+	def _intern(self, host: str) -> int:
+		index = self._host_index.get(host)
+		if index is None:
+			index = self._host_index[host] = len(self._hosts)
+			self._hosts.append(host)
+		return index
+
+	def register(self, host: str, port: int, slot: int = 0) -> int:
+		host_index = self._host_index.get(host)
+		if host_index is None:
+			host_index = self._intern(host)
+		entry_id = self._ids.get(self._key(host_index, port, slot))
+		if entry_id is None:
+			entry_id = self.next_id
+			self.next_id += 1
+			self._add(entry_id, host_index, port, slot)
+		return entry_id
+
+	def restore(self, entry_id: int, host: str, port: int, slot: int = 0) -> None:
+		# Puts back an entry under the ID it had before a restart
+		self.remove(entry_id)
+		self._add(entry_id, self._intern(host), port, slot)
+		self.next_id = max(self.next_id, entry_id + 1)
+
+	def _add(self, entry_id: int, host_index: int, port: int, slot: int) -> None:
+		missing = entry_id - len(self._host)
+		if missing == 0:
+			# The usual case, a new ID
+			self._host.append(host_index)
+			self._port.append(port)
+			self._slot.append(slot)
+		else:
+			if missing > 0:
+				self._host.extend(array('i', [-1]) * (missing + 1))
+				self._port.extend(array('i', [0]) * (missing + 1))
+				self._slot.extend(array('i', [0]) * (missing + 1))
+			self._host[entry_id] = host_index
+			self._port[entry_id] = port
+			self._slot[entry_id] = slot
+		self._ids[self._key(host_index, port, slot)] = entry_id
+		self._count += 1
+
+	def lookup(self, host: str, port: int, slot: int = 0) -> int | None:
+		host_index = self._host_index.get(host)
+		if host_index is None:
+			return None
+		return self._ids.get(self._key(host_index, port, slot))
+
+	def remove(self, entry_id: int) -> None:
+		if entry_id not in self:
+			return
+		host_index = self._host[entry_id]
+		del self._ids[self._key(host_index, self._port[entry_id], self._slot[entry_id])]
+		self._host[entry_id] = -1
+		self._count -= 1
+
+	def copy(self) -> dict[int, tuple[str, int]]:
+		return dict(self.items())
+
+	def items(self) -> Iterator[tuple[int, tuple[str, int]]]:
+		hosts = self._hosts
+		for entry_id, (host_index, port) in enumerate(
+			zip(self._host, self._port, strict=True)
+		):
+			if host_index >= 0:
+				yield entry_id, (hosts[host_index], port)
+
+	def slots(self) -> dict[int, int]:
+		# Only entries sharing their endpoint with others have a slot
+		return {
+			entry_id: slot
+			for entry_id, (host_index, slot) in enumerate(
+				zip(self._host, self._slot, strict=True)
+			)
+			if host_index >= 0 and slot
+		}
+
+	def __getitem__(self, entry_id: int) -> tuple[str, int]:
+		host_index = self._host[entry_id] if 0 <= entry_id < len(self._host) else -1
+		if host_index < 0:
+			raise KeyError(entry_id)
+		return self._hosts[host_index], self._port[entry_id]
+
+	def __contains__(self, entry_id: object) -> bool:
+		return (
+			isinstance(entry_id, int)
+			and 0 <= entry_id < len(self._host)
+			and self._host[entry_id] >= 0
+		)
+
+	def __len__(self) -> int:
+		return self._count
+
+
+class FloatColumn:
+	# A float per ID for state that most entries have, such as when they
+	# started waiting; NaN where unset
+	def __init__(self) -> None:
+		self._values = array('d')
+
+	def __setitem__(self, entry_id: int, value: float) -> None:
+		missing = entry_id + 1 - len(self._values)
+		if missing > 0:
+			self._values.extend(array('d', [math.nan]) * missing)
+		self._values[entry_id] = value
+
+	def pop(self, entry_id: int, default: float) -> float:
+		if entry_id >= len(self._values) or math.isnan(self._values[entry_id]):
+			return default
+		value = self._values[entry_id]
+		self._values[entry_id] = math.nan
+		return value
+
+	def update(self, items: Iterable[tuple[int, float]]) -> None:
+		for entry_id, value in items:
+			self[entry_id] = value
@@ -1,129 +1,880 @@
+import contextlib
+import functools
+import queue
 import threading
 import time
 from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent import futures
+from dataclasses import dataclass, field
+from pathlib import Path
 
 import grpc
-from google.protobuf import empty_pb2
 
 from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services import journal
 from services.base import BaseService
+from services.coalescer import Batch, Coalescer, Endpoint, FlushThread
+from services.journal import CoordinatorState, Journal
+from services.leases import Leases
+from services.metrics import Histogram, MetricsRegistry, RateMeter, serve_prometheus
+from services.notifier import Notifier
+from services.registry import FloatColumn, Registry
+from services.status import Status, StatusBoard
+from services.waiting_queue import WaitingQueue
+
+type Publish = Callable[[rollercoaster_pb2.Event | None], object]
+
+
+class BoardingError(Exception):
+	def __init__(self, failed: list[int]) -> None:
+		super().__init__(f'{len(failed)} passengers failed to board')
+		self.failed = failed
+
+
+@dataclass(slots=True)
+class Ride:
+	wagon_id: int
+	wagon: tuple[str, int]
+	passengers: dict[int, tuple[str, int]]
+	waiting_since: dict[int, float] = field(default_factory=dict)
+	dispatched_at: float = 0.0
+
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CYCLE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0, 120.0)
 
 
 class RollercoasterService(BaseService, rollercoaster_pb2_grpc.rollercoasterServicer):
 	def __init__(self, host: str = '0.0.0.0', port: int = 50051) -> None:
 		super().__init__(host, port)
-		self._wagons: dict[int, tuple[str, int]] = {}
-		self._passengers: dict[int, tuple[str, int]] = {}
-		self._wagon_order = deque()
+		self._wagons = Registry()
+		self._passengers = Registry()
+		self._wagon_order: deque[int] = deque()
+		# Passengers of each ride a wagon still has to report, and arrivals
+		# that came in before the wagon ahead of them did
+		self._riding: dict[int, deque[list[int]]] = {}
+		self._early_arrivals: dict[int, deque[list[int]]] = {}
+		# Passengers freed by recovery, told to disembark on the coordinator's
+		# first pass and kept in snapshots until then
+		self._recovered: dict[int, tuple[str, int]] = {}
 		self.wagon_cap = 2
+		self._wagon_capacity: dict[int, int] = {}
+		self._seats = 0
+		# Admission control: a fixed bound on waiting passengers, or None to
+		# keep twice the fleet's seats queued so every returning wagon fills
+		self.max_waiting_passengers: int | None = None
+		self.min_waiting_passengers = 16
+		# One of several shards: while it has no wagons, passengers are sent
+		# on to the next shard rather than queued for a ride that never comes
+		self.sharded = False
 		self._waiting_wagons = deque()
-		self._waiting_passengers: list[int] = []
+		self._waiting_passengers = WaitingQueue()
 		self._lock = threading.Lock()
+		self._ride_ready = threading.Condition(self._lock)
 		self._ride_thread: threading.Thread | None = None
+		self._dispatcher: futures.ThreadPoolExecutor | None = None
+		self.dispatch_workers = 8
+		self.rpc_timeout = 5.0
+		self._subscribers: dict[tuple[str, int], Publish] = {}
+		self.max_streams = 64
+		self._streams = 0
+		self.notifier = Notifier()
+		# Boarding and disembark calls for passengers without a subscription
+		# are gathered into one call per endpoint, and flushed from one thread
+		self._flusher = FlushThread()
+		self._boarding_notices = Coalescer(self._send_boarding, self._call_later)
+		self._disembark_notices = Coalescer(self._send_disembarking, self._call_later)
 		self._running = False
+		# Every registration, heartbeat and arrival renews a lease
+		self.lease_duration = 15.0
+		self._wagon_leases = Leases()
+		self._passenger_leases = Leases()
+		# When each waiting passenger registered, and when each outstanding
+		# ride of a wagon departed
+		self._waiting_since = FloatColumn()
+		self._departed_at: dict[int, deque[float]] = {}
+		# Wagons whose depart failed, so they are neither riding nor waiting
+		# and may never call again; their next heartbeat sends them back
+		self._stranded: set[int] = set()
+		self._stop_metrics: Callable[[], None] | None = None
+		# Counts for get_status and watch_status, republished after every
+		# change so reading them never takes self._lock
+		self._status = StatusBoard()
+		# Least time between two updates to one watcher
+		self.status_interval = 0.1
+		self.journal: Journal | None = None
+		self._init_metrics()
+
+	def _init_metrics(self) -> None:
+		self.metrics = metrics = MetricsRegistry()
+		self._passenger_registrations = metrics.counter(
+			'rollercoaster_passenger_registrations_total', 'Passenger registrations'
+		)
+		self._wagon_registrations = metrics.counter(
+			'rollercoaster_wagon_registrations_total', 'Wagon registrations'
+		)
+		self._rides_dispatched = metrics.counter(
+			'rollercoaster_rides_dispatched_total', 'Rides taken off the queues'
+		)
+		self._rides_completed = metrics.counter(
+			'rollercoaster_rides_completed_total', 'Rides whose wagon arrived'
+		)
+		self._rides_failed = metrics.counter(
+			'rollercoaster_rides_failed_total', 'Rides requeued after a failed call'
+		)
+		self._ride_rate = RateMeter(now=lambda: self.clock.now())
+		self._boarding_rate = RateMeter(window=10, now=lambda: self.clock.now())
+		self._expirations = metrics.counter(
+			'rollercoaster_lease_expirations_total',
+			'Wagons and passengers forgotten after missing their heartbeats',
+		)
+		self._rejections = metrics.counter(
+			'rollercoaster_passenger_rejections_total',
+			'Passenger registrations turned away because the queue was full',
+		)
+		metrics.gauge(
+			'rollercoaster_waiting_passengers_limit',
+			'Waiting passengers admitted before registrations are turned away',
+			self._queue_limit,
+		)
+		metrics.gauge(
+			'rollercoaster_rides_per_second',
+			'Completed rides per second over the last minute',
+			self._ride_rate.rate,
+		)
+		metrics.gauge(
+			'rollercoaster_waiting_passengers',
+			'Passengers waiting for a ride',
+			lambda: len(self._waiting_passengers),
+		)
+		metrics.gauge(
+			'rollercoaster_waiting_wagons',
+			'Wagons waiting for passengers',
+			lambda: len(self._waiting_wagons),
+		)
+		metrics.gauge(
+			'rollercoaster_rides_in_flight',
+			'Dispatched rides whose arrival has not been released',
+			lambda: len(self._wagon_order),
+		)
+		metrics.gauge(
+			'rollercoaster_registered_passengers',
+			'Registered passengers',
+			lambda: len(self._passengers),
+		)
+		metrics.gauge(
+			'rollercoaster_registered_wagons',
+			'Registered wagons',
+			lambda: len(self._wagons),
+		)
+		self._passenger_wait = metrics.histogram(
+			'rollercoaster_passenger_wait_seconds',
+			'Time from registration to boarding',
+			WAIT_BUCKETS,
+		)
+		self._boarding = metrics.histogram(
+			'rollercoaster_boarding_seconds',
+			'Time from dispatching a ride to every passenger having boarded',
+			WAIT_BUCKETS,
+		)
+		self._ride_cycle = metrics.histogram(
+			'rollercoaster_ride_cycle_seconds',
+			'Time from departure to arrival',
+			CYCLE_BUCKETS,
+		)
+		for key in ('sent', 'retried', 'failed'):
+			metrics.counter_view(
+				f'rollercoaster_notifications_{key}_total',
+				f'Disembark notifications {key}',
+				lambda key=key: self.notifier.stats()[key],
+			)
+		for key in ('batches', 'notices'):
+			metrics.counter_view(
+				f'rollercoaster_passenger_notice_{key}_total',
+				f'Boarding and disembark {key} sent to passenger endpoints',
+				lambda key=key: (
+					self._boarding_notices.stats()[key]
+					+ self._disembark_notices.stats()[key]
+				),
+			)
+		for key in ('hits', 'misses', 'evictions'):
+			metrics.counter_view(
+				f'rollercoaster_channel_pool_{key}_total',
+				f'Channel pool {key}',
+				lambda key=key: self.channels.stats()[key],
+			)
+
+	def start_metrics_server(self, port: int) -> None:
+		self._stop_metrics = serve_prometheus(self.metrics, self.host, port)
+		print(f'metrics served on {self.host}:{port}/metrics')
+
+	def open_journal(self, directory: str) -> None:
+		# Rebuilds the state from the last snapshot and the logs after it,
+		# then logs every change from here on
+		log = Journal(Path(directory))
+		state, records = log.recover()
+		with self._lock:
+			if state is not None:
+				self._restore(state)
+			for kind, body in records:
+				self._replay(kind, memoryview(body))
+			# Buffered until the log is opened below, after what it replayed
+			self.journal = log
+			requeued = self._requeue_restored_rides()
+			now = self.clock.now()
+			self._waiting_since.update((pid, now) for pid in self._waiting_passengers)
+			# Everyone restored gets a fresh lease to prove they are still there
+			for wid, _ in self._wagons.items():
+				self._renew(True, wid)
+			for pid, _ in self._passengers.items():
+				self._renew(False, pid)
+			self._status_changed()
+		print(
+			f'restored {len(self._wagons)} wagons, {len(self._passengers)} passengers '
+			f'and {len(self._wagon_order)} rides from {directory} '
+			f'({len(records)} log records), requeued {requeued} unfinished rides'
+		)
+		log.on_snapshot_due = self.write_snapshot
+		log.open()
+
+	def _requeue_restored_rides(self) -> int:
+		# Caller holds self._lock. The log can't tell whether a ride's depart
+		# went out before the crash, and nothing would resend it, so every
+		# unfinished ride goes back to the queue. A wagon that had left after
+		# all reports an arrival for a ride it no longer has, which is
+		# ignored like any repeat.
+		requeued = 0
+		# Back to front, as each goes ahead of the ones already requeued
+		for wagon_id, rides in reversed(list(self._riding.items())):
+			for position, passenger_ids in reversed(list(enumerate(rides))):
+				# The wagon goes back once, ahead of its rides' passengers
+				requeue_wagon = position == 0
+				self._apply_requeue(wagon_id, passenger_ids, requeue_wagon)
+				self._log(
+					journal.REQUEUE_WAGON if requeue_wagon else journal.REQUEUE,
+					journal.encode_ids(wagon_id, passenger_ids),
+				)
+				requeued += 1
+		self._recovered |= self._release_arrivals()
+		return requeued
+
+	def _log(self, kind: int, body: bytes) -> None:
+		# Caller holds self._lock, which keeps the log in state order
+		if self.journal is not None:
+			self.journal.append(kind, body)
+
+	def write_snapshot(self) -> None:
+		if self.journal is None:
+			return
+		with self._lock:
+			state = self._capture()
+			next_log = self.journal.rotate()
+		self.journal.write_snapshot(state, next_log)
+
+	def _capture(self) -> CoordinatorState:
+		# Caller holds self._lock
+		return CoordinatorState(
+			wagons=self._wagons.copy(),
+			wagon_next_id=self._wagons.next_id,
+			wagon_capacity=self._wagon_capacity.copy(),
+			passengers=self._passengers.copy(),
+			passenger_next_id=self._passengers.next_id,
+			waiting_wagons=list(self._waiting_wagons),
+			waiting_passengers=self._waiting_passengers.copy(),
+			wagon_order=list(self._wagon_order),
+			wagon_slots=self._wagons.slots(),
+			passenger_slots=self._passengers.slots(),
+			riding={wid: list(rides) for wid, rides in self._riding.items()},
+			early_arrivals={
+				wid: list(arrivals) for wid, arrivals in self._early_arrivals.items()
+			},
+			recovered=list(self._recovered),
+		)
+
+	def _restore(self, state: CoordinatorState) -> None:
+		# Caller holds self._lock
+		for wid, (host, port) in state.wagons.items():
+			self._wagons.restore(wid, host, port, state.wagon_slots.get(wid, 0))
+		self._wagons.next_id = state.wagon_next_id
+		for wid, capacity in state.wagon_capacity.items():
+			self._set_capacity(wid, capacity)
+		for pid, (host, port) in state.passengers.items():
+			self._passengers.restore(pid, host, port, state.passenger_slots.get(pid, 0))
+		self._passengers.next_id = state.passenger_next_id
+		self._waiting_wagons.extend(state.waiting_wagons)
+		self._waiting_passengers.push_front(state.waiting_passengers)
+		self._wagon_order.extend(state.wagon_order)
+		for wid, rides in state.riding.items():
+			self._riding[wid] = deque(rides)
+		for wid, arrivals in state.early_arrivals.items():
+			self._early_arrivals[wid] = deque(arrivals)
+		self._recovered = {
+			pid: self._passengers[pid]
+			for pid in state.recovered
+			if pid in self._passengers
+		}
+
+	def _replay(self, kind: int, body: memoryview) -> None:
+		# Caller holds self._lock. Mirrors what the live path did when it
+		# logged the record.
+		if kind in (journal.WAGON, journal.PASSENGER):
+			entry_id, host, port, extra, slot = journal.decode_registration(body)
+			if kind == journal.WAGON:
+				self._wagons.restore(entry_id, host, port, slot)
+				self._set_capacity(entry_id, extra)
+				if (
+					entry_id not in self._riding
+					and entry_id not in self._waiting_wagons
+				):
+					self._waiting_wagons.append(entry_id)
+			else:
+				self._passengers.restore(entry_id, host, port, slot)
+				if extra:
+					self._waiting_passengers.push(entry_id)
+			return
+
+		wagon_id, passenger_ids = journal.decode_ids(body)
+		if kind == journal.RIDE:
+			self._waiting_wagons.remove(wagon_id)
+			for pid in passenger_ids:
+				self._waiting_passengers.discard(pid)
+			self._apply_ride(wagon_id, passenger_ids)
+		elif kind == journal.ARRIVAL:
+			if self._apply_arrival(wagon_id, passenger_ids):
+				self._release_arrivals()
+		elif kind in (journal.REQUEUE, journal.REQUEUE_WAGON):
+			self._apply_requeue(wagon_id, passenger_ids, kind == journal.REQUEUE_WAGON)
+			self._release_arrivals()
+		elif kind == journal.DISCARD:
+			for pid in passenger_ids:
+				self._waiting_passengers.discard(pid)
+		elif kind == journal.EXPIRE_WAGON:
+			self._expire_wagon(wagon_id)
+		elif kind == journal.EXPIRE_PASSENGER:
+			self._expire_passenger(wagon_id)
 
 	def _configure_server(self, server: grpc.Server) -> None:
 		rollercoaster_pb2_grpc.add_rollercoasterServicer_to_server(self, server)
 		self._start_ride_coordinator()
 
 	def get_status(self, request, context) -> rollercoaster_pb2.StatusResponse:
-		status = rollercoaster_pb2.StatusResponse(
-			total_wagons=len(self._wagons),
-			total_passengers=len(self._passengers),
-			waiting_passengers=len(self._waiting_passengers),
+		status = self._status.current
+		return rollercoaster_pb2.StatusResponse(
+			total_wagons=status.total_wagons,
+			total_passengers=status.total_passengers,
+			waiting_passengers=status.waiting_passengers,
+			waiting_wagons=status.waiting_wagons,
+			rides_in_flight=status.rides_in_flight,
+			rides_total=status.rides_total,
+			rides_per_second=self._ride_rate.rate(),
+			passenger_wait_seconds=_histogram_message(self._passenger_wait),
+			ride_cycle_seconds=_histogram_message(self._ride_cycle),
+		)
+
+	def watch_status(
+		self, request, context
+	) -> Iterator[rollercoaster_pb2.StatusUpdate]:
+		with self._stream_slot(context):
+			yield from self._watch_status(context)
+
+	def _watch_status(self, context) -> Iterator[rollercoaster_pb2.StatusUpdate]:
+		changed = threading.Event()
+		unwatch = self._status.watch(changed.set)
+		context.add_callback(changed.set)
+		try:
+			sent = None
+			while not self._status.closed and context.is_active():
+				changed.clear()
+				status = self._status.current
+				if sent is None or status.version != sent.version:
+					yield _status_update(status, sent)
+					sent = status
+				changed.wait()
+				# Whatever else changes meanwhile goes out in the same update
+				time.sleep(self.status_interval)
+		finally:
+			unwatch()
+
+	def _status_changed(self) -> None:
+		# Caller holds self._lock, after changing any of the counts
+		self._status.publish(
+			len(self._wagons),
+			len(self._passengers),
+			len(self._waiting_passengers),
+			len(self._waiting_wagons),
+			len(self._wagon_order),
+			self._rides_completed.value,
 		)
-		print(status)
-		return status
 
 	def register_wagon(
 		self, request, context
 	) -> rollercoaster_pb2.RegistrationResponse:
 		with self._lock:
-			wagon_id = self.get_wagon_id(request)
-			self._wagons[wagon_id] = (request.host, request.port)
+			response = self._register_wagon(request)
+			self._status_changed()
+		print(f'Wagon {response.id} registered from {request.host}:{request.port}')
+		return response
+
+	def register_wagons_bulk(
+		self, request, context
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		with self._lock:
+			responses = [self._register_wagon(r) for r in request.registrations]
+			self._status_changed()
+		print(f'{len(responses)} wagons registered in bulk')
+		return rollercoaster_pb2.RegistrationBatchResponse(registrations=responses)
+
+	def _register_wagon(
+		self, request: rollercoaster_pb2.RegistrationRequest
+	) -> rollercoaster_pb2.RegistrationResponse:
+		# Caller holds self._lock
+		wagon_id = self._wagons.register(request.host, request.port, request.slot)
+		self._stranded.discard(wagon_id)
+		self._set_capacity(wagon_id, max(request.capacity, 0))
+		# A repeat, or one from a wagon still out on a ride, doesn't queue it twice
+		if wagon_id not in self._riding and wagon_id not in self._waiting_wagons:
 			self._waiting_wagons.append(wagon_id)
-			print(f'Wagon {wagon_id} registered from {request.host}:{request.port}')
-			return rollercoaster_pb2.RegistrationResponse(id=wagon_id, success=True)
+		self._log(
+			journal.WAGON,
+			journal.encode_registration(
+				wagon_id,
+				request.host,
+				request.port,
+				self._wagon_capacity[wagon_id],
+				request.slot,
+			),
+		)
+		self._wagon_registrations.inc()
+		self._renew(True, wagon_id)
+		self._wake_coordinator()
+		return rollercoaster_pb2.RegistrationResponse(
+			id=wagon_id, success=True, lease_ms=self._lease_ms()
+		)
 
-	def arrive(self, request, context) -> rollercoaster_pb2.arrive_response:
-		wagon_id = request.wagon_id
-		try:
-			if self._wagon_order.index(wagon_id) != 0:
-				return rollercoaster_pb2.arrive_response(success=False)
-			self._wagon_order.popleft()
-			passenger_ids = list(request.passenger_id)
+	def heartbeat(self, request, context) -> rollercoaster_pb2.HeartbeatResponse:
+		registry = self._wagons if request.wagon else self._passengers
+		unknown = []
+		with self._lock:
+			for entry_id in (request.id, *request.ids):
+				if request.wagon and entry_id in self._stranded:
+					# Answered as if forgotten, which makes it register again
+					unknown.append(entry_id)
+				elif entry_id in registry:
+					self._renew(request.wagon, entry_id)
+				else:
+					unknown.append(entry_id)
+		return rollercoaster_pb2.HeartbeatResponse(
+			known=not unknown, unknown_ids=unknown
+		)
+
+	def _lease_ms(self) -> int:
+		return int(self.lease_duration * 1000)
+
+	def _renew(self, wagon: bool, entry_id: int) -> None:
+		# Caller holds self._lock
+		if not self.lease_duration:
+			return
+		leases = self._wagon_leases if wagon else self._passenger_leases
+		leases.renew(entry_id, self.clock.now() + self.lease_duration)
+
+	def _reap_expired(self) -> dict[int, tuple[str, int]]:
+		# Caller holds self._lock. Returns the passengers whose ride was lost
+		# with its wagon, together with any arrivals that freed up.
+		released: dict[int, tuple[str, int]] = {}
+		now = self.clock.now()
+		for wagon_id in self._wagon_leases.expired(now):
+			if wagon_id in self._wagons:
+				self._expirations.inc()
+				self._log(journal.EXPIRE_WAGON, journal.encode_ids(wagon_id, []))
+				released |= self._expire_wagon(wagon_id)
+				print(f'Wagon {wagon_id} lease expired')
+		for passenger_id in self._passenger_leases.expired(now):
+			if passenger_id in self._passengers:
+				self._expirations.inc()
+				self._log(
+					journal.EXPIRE_PASSENGER, journal.encode_ids(passenger_id, [])
+				)
+				self._expire_passenger(passenger_id)
+				print(f'Passenger {passenger_id} lease expired')
+		return released
+
+	def _expire_wagon(self, wagon_id: int) -> dict[int, tuple[str, int]]:
+		# Caller holds self._lock. A dead wagon still in _waiting_wagons is
+		# skipped once it reaches the front.
+		self._wagons.remove(wagon_id)
+		self._stranded.discard(wagon_id)
+		if wagon_id in self._wagon_capacity:
+			self._seats -= self._capacity(wagon_id)
+			del self._wagon_capacity[wagon_id]
+		self._departed_at.pop(wagon_id, None)
+		# Rides it never reported are over; the ones it did report keep
+		# their place in line
+		lost = self._riding.pop(wagon_id, deque())
+		for _ in lost:
+			self._drop_latest_ride(wagon_id)
+		released = self._release_arrivals()
+		for passenger_ids in lost:
 			for pid in passenger_ids:
 				if pid in self._passengers:
-					p_host, p_port = self._passengers[pid]
-					self.call_passenger_disembarking(p_host, p_port)
-	
-			return rollercoaster_pb2.arrive_response(success=True)
-		except ValueError:
-			return rollercoaster_pb2.arrive_response(success=False)
-
-	def get_next_wid(self):
-		return len(self._wagons)
-
-	def get_wagon_id(self, request):
-		return next(
-			(
-				key
-				for key, value in self._wagons.items()
-				if value == (request.host, request.port)
-			),
-			self.get_next_wid(),
+					released[pid] = self._passengers[pid]
+		return released
+
+	def _expire_passenger(self, passenger_id: int) -> None:
+		# Caller holds self._lock
+		self._passengers.remove(passenger_id)
+		self._waiting_passengers.discard(passenger_id)
+		self._waiting_since.pop(passenger_id, 0.0)
+
+	def arrive(self, request, context) -> rollercoaster_pb2.arrive_response:
+		passengers = self._arrive(request.wagon_id, list(request.passenger_id))
+		self.disembark_passengers(passengers)
+		return rollercoaster_pb2.arrive_response(success=True)
+
+	def arrive_bulk(self, request, context) -> rollercoaster_pb2.ArrivalBatchResponse:
+		passengers = self._arrive_bulk(
+			[(a.wagon_id, list(a.passenger_id)) for a in request.arrivals]
+		)
+		self.disembark_passengers(passengers)
+		return rollercoaster_pb2.ArrivalBatchResponse(
+			arrivals=[
+				rollercoaster_pb2.arrive_response(success=True)
+				for _ in request.arrivals
+			]
+		)
+
+	def _arrive(
+		self, wagon_id: int, passenger_ids: list[int]
+	) -> dict[int, tuple[str, int]]:
+		return self._arrive_bulk([(wagon_id, passenger_ids)])
+
+	def _arrive_bulk(
+		self, arrivals: list[tuple[int, list[int]]]
+	) -> dict[int, tuple[str, int]]:
+		# Returns the passengers that can disembark now. Every arrival is
+		# acknowledged; repeats of one that was already recorded are ignored.
+		with self._lock:
+			recorded = []
+			for wagon_id, passenger_ids in arrivals:
+				if not self._apply_arrival(wagon_id, passenger_ids):
+					continue
+				self._log(journal.ARRIVAL, journal.encode_ids(wagon_id, passenger_ids))
+				self._record_arrival(wagon_id)
+				self._renew(True, wagon_id)
+				recorded.append(wagon_id)
+			if not recorded:
+				return {}
+
+			released = self._release_arrivals()
+			if not released:
+				print(f'Wagons {recorded} arrived early, holding their passengers')
+			self._wake_coordinator()
+			self._status_changed()
+			return released
+
+	def _apply_arrival(self, wagon_id: int, passenger_ids: list[int]) -> bool:
+		# Caller holds self._lock
+		rides = self._riding.get(wagon_id)
+		if not rides:
+			return False
+		rides.popleft()
+		if not rides:
+			del self._riding[wagon_id]
+		self._early_arrivals.setdefault(wagon_id, deque()).append(passenger_ids)
+		return True
+
+	def _record_arrival(self, wagon_id: int) -> None:
+		# Caller holds self._lock
+		self._rides_completed.inc()
+		self._ride_rate.mark()
+		departed = self._departed_at.get(wagon_id)
+		if departed:
+			self._ride_cycle.observe(self.clock.now() - departed.popleft())
+			if not departed:
+				del self._departed_at[wagon_id]
+
+	def _release_arrivals(self) -> dict[int, tuple[str, int]]:
+		# Caller holds self._lock. Releases buffered arrivals for as long as
+		# the head of the line is among them.
+		released: list[int] = []
+		while self._wagon_order and self._wagon_order[0] in self._early_arrivals:
+			head = self._wagon_order.popleft()
+			buffered = self._early_arrivals[head]
+			released.extend(buffered.popleft())
+			if not buffered:
+				del self._early_arrivals[head]
+		return {
+			pid: self._passengers[pid] for pid in released if pid in self._passengers
+		}
+
+	def subscribe(self, request, context) -> Iterator[rollercoaster_pb2.Event]:
+		with self._stream_slot(context):
+			events: queue.SimpleQueue[rollercoaster_pb2.Event | None] = (
+				queue.SimpleQueue()
+			)
+			unsubscribe = self._subscribe((request.host, request.port), events.put)
+			context.add_callback(lambda: events.put(None))
+			try:
+				yield rollercoaster_pb2.Event(kind=rollercoaster_pb2.Event.SUBSCRIBED)
+				while (event := events.get()) is not None:
+					yield event
+			finally:
+				unsubscribe()
+
+	@contextlib.contextmanager
+	def _stream_slot(self, context) -> Iterator[None]:
+		# Sync streams run on the max_streams threads the server has on top
+		# of its workers; once those are taken, more would queue behind
+		# unary calls forever, so they are turned away instead
+		with self._lock:
+			admitted = self._streams < self.max_streams
+			self._streams += admitted
+		if not admitted:
+			context.abort(
+				grpc.StatusCode.RESOURCE_EXHAUSTED,
+				f'already serving {self.max_streams} streams, use --aio for more',
+			)
+		try:
+			yield
+		finally:
+			with self._lock:
+				self._streams -= 1
+
+	def _subscribe(
+		self, endpoint: tuple[str, int], publish: Publish
+	) -> Callable[[], None]:
+		with self._lock:
+			previous = self._subscribers.get(endpoint)
+			self._subscribers[endpoint] = publish
+		if previous is not None:
+			# A client that reconnects replaces its old stream
+			previous(None)
+		print(f'{endpoint[0]}:{endpoint[1]} subscribed to events')
+
+		def unsubscribe() -> None:
+			with self._lock:
+				if self._subscribers.get(endpoint) is publish:
+					del self._subscribers[endpoint]
+
+		return unsubscribe
+
+	def _publish(
+		self,
+		endpoint: tuple[str, int],
+		kind: rollercoaster_pb2.Event.Kind.ValueType,
+		passenger_ids: list[int],
+		wagon_id: int = 0,
+	) -> bool:
+		publish = self._subscribers.get(endpoint)
+		if publish is None:
+			return False
+		publish(
+			rollercoaster_pb2.Event(
+				kind=kind, passenger_id=passenger_ids, wagon_id=wagon_id
+			)
 		)
+		return True
 
 	def register_passenger(
 		self, request, context
 	) -> rollercoaster_pb2.RegistrationResponse:
 		with self._lock:
-			passenger_id = self.get_passenger_id(request)
-			self._passengers[passenger_id] = (request.host, request.port)
-			self._waiting_passengers.append(passenger_id)
+			response = self._register_passenger(request)
+			self._status_changed()
+		if response.success:
 			print(
-				f'Passenger {passenger_id} registered from {request.host}:{request.port}'
+				f'Passenger {response.id} registered from {request.host}:{request.port}'
 			)
-			return rollercoaster_pb2.RegistrationResponse(id=passenger_id, success=True)
-
-	def get_passenger_id(self, request):
-		return next(
-			(
-				key
-				for key, value in self._passengers.items()
-				if value == (request.host, request.port)
-			),
-			self.get_next_pid(),
+		else:
+			print(f'Passenger {response.id} turned away, queue full')
+		return response
+
+	def register_passengers_bulk(
+		self, request, context
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		with self._lock:
+			responses = [self._register_passenger(r) for r in request.registrations]
+			self._status_changed()
+		print(f'{len(responses)} passengers registered in bulk')
+		return rollercoaster_pb2.RegistrationBatchResponse(registrations=responses)
+
+	def _set_capacity(self, wagon_id: int, capacity: int) -> None:
+		# Caller holds self._lock
+		self._seats -= (
+			self._capacity(wagon_id) if wagon_id in self._wagon_capacity else 0
 		)
+		self._wagon_capacity[wagon_id] = capacity
+		self._seats += self._capacity(wagon_id)
+
+	def _queue_limit(self) -> int:
+		if self.max_waiting_passengers is not None:
+			return self.max_waiting_passengers
+		return max(self.min_waiting_passengers, 2 * self._seats)
 
-	def get_next_pid(self):
-		return len(self._passengers)
+	def _retry_after_ms(self) -> int:
+		# How long, at the recent boarding rate, until the queue is down to
+		# half its limit. Coming back only once there is room for a crowd
+		# keeps turned-away passengers from polling a full queue.
+		rate = self._boarding_rate.rate()
+		if rate <= 0:
+			return 5000
+		excess = len(self._waiting_passengers) - self._queue_limit() // 2
+		return min(max(int(1000 * excess / rate), 100), 30_000)
+
+	def _register_passenger(
+		self, request: rollercoaster_pb2.RegistrationRequest
+	) -> rollercoaster_pb2.RegistrationResponse:
+		# Caller holds self._lock
+		if self.sharded and not self._wagons:
+			return rollercoaster_pb2.RegistrationResponse(
+				success=False, retry_after_ms=1000, no_wagons=True
+			)
+		passenger_id = self._passengers.register(
+			request.host, request.port, request.slot
+		)
+		self._passenger_registrations.inc()
+		self._renew(False, passenger_id)
+		if passenger_id in self._waiting_passengers:
+			return rollercoaster_pb2.RegistrationResponse(
+				id=passenger_id, success=True, lease_ms=self._lease_ms()
+			)
+		admitted = len(self._waiting_passengers) < self._queue_limit()
+		if admitted:
+			self._waiting_passengers.push(passenger_id)
+		self._log(
+			journal.PASSENGER,
+			journal.encode_registration(
+				passenger_id, request.host, request.port, admitted, request.slot
+			),
+		)
+		if not admitted:
+			self._rejections.inc()
+			return rollercoaster_pb2.RegistrationResponse(
+				id=passenger_id,
+				success=False,
+				retry_after_ms=self._retry_after_ms(),
+				lease_ms=self._lease_ms(),
+			)
+		self._waiting_since[passenger_id] = self.clock.now()
+		self._wake_coordinator()
+		return rollercoaster_pb2.RegistrationResponse(
+			id=passenger_id,
+			success=True,
+			queue_position=len(self._waiting_passengers),
+			lease_ms=self._lease_ms(),
+		)
 
 	def call_wagon_depart(
-		self, wagon_host: str, wagon_port: int, passenger_ids: list[int]
+		self, wagon_host: str, wagon_port: int, passenger_ids: list[int], wagon_id: int
 	) -> None:
-		channel = self.create_channel(wagon_host, wagon_port)
-		stub = rollercoaster_pb2_grpc.wagonStub(channel)
-		passenger_list = rollercoaster_pb2.passenger_list(passenger_id=passenger_ids)
+		if self._publish(
+			(wagon_host, wagon_port),
+			rollercoaster_pb2.Event.DEPARTING,
+			passenger_ids,
+			wagon_id,
+		):
+			return
+		stub = self.get_stub(wagon_host, wagon_port, rollercoaster_pb2_grpc.wagonStub)
+		passenger_list = rollercoaster_pb2.passenger_list(
+			passenger_id=passenger_ids, wagon_id=wagon_id
+		)
 		print('wagon depart')
-		stub.depart(passenger_list)
-		channel.close()
+		stub.depart(passenger_list, timeout=self.rpc_timeout)
+
+	def board_passengers(self, passengers: dict[int, tuple[str, int]]) -> None:
+		print(f'{len(passengers)} passengers boarding')
+		batches = self._queue_boarding(passengers)
+		# A batch that hasn't settled by then counts as failed
+		_, late = futures.wait(batches, timeout=self.rpc_timeout)
+		failed = [
+			pid
+			for done, pids in batches.items()
+			if done in late or done.exception() is not None
+			for pid in pids
+		]
+		if failed:
+			raise BoardingError(failed)
+
+	def _queue_boarding(
+		self, passengers: dict[int, tuple[str, int]]
+	) -> dict[futures.Future[None], list[int]]:
+		# Maps each batch this ride's passengers went into to the ones that
+		# did; a batch that fails fails all of them
+		batches: dict[futures.Future[None], list[int]] = {}
+		for endpoint, pids in _by_endpoint(self._publish_boarding(passengers)).items():
+			batches[self._boarding_notices.add(endpoint, pids)] = pids
+		return batches
+
+	def _send_boarding(self, endpoint: Endpoint, batch: Batch) -> None:
+		call = self.get_stub(
+			*endpoint, rollercoaster_pb2_grpc.passengerStub
+		).i_am_boarding_bulk.future(
+			rollercoaster_pb2.PassengerBatch(passenger_id=batch.passenger_ids),
+			timeout=self.rpc_timeout,
+		)
+		call.add_done_callback(lambda call: batch.settle(call.exception()))
+
+	def _publish_boarding(
+		self, passengers: dict[int, tuple[str, int]]
+	) -> dict[int, tuple[str, int]]:
+		# Returns the passengers that still have to be called back
+		return {
+			pid: endpoint
+			for pid, endpoint in passengers.items()
+			if not self._publish(endpoint, rollercoaster_pb2.Event.BOARDING, [pid])
+		}
+
+	def disembark_passengers(self, passengers: dict[int, tuple[str, int]]) -> None:
+		for pid, endpoint in passengers.items():
+			if not self._publish(endpoint, rollercoaster_pb2.Event.DISEMBARKING, [pid]):
+				self._disembark_notices.add(endpoint, [pid])
+
+	def _send_disembarking(self, endpoint: Endpoint, batch: Batch) -> None:
+		# Nothing waits for these; the notifier retries and counts failures
+		self.notifier.submit(
+			functools.partial(
+				self.call_passengers_disembarking, *endpoint, batch.passenger_ids
+			)
+		)
+		batch.settle(None)
 
-	def call_passenger_boarding(self, passenger_host: str, passenger_port: int) -> None:
-		channel = self.create_channel(passenger_host, passenger_port)
-		stub = rollercoaster_pb2_grpc.passengerStub(channel)
-		print('passenger boarding')
-		stub.i_am_boarding(empty_pb2.Empty())
-		channel.close()
+	def call_passengers_disembarking(
+		self,
+		passenger_host: str,
+		passenger_port: int,
+		passenger_ids: list[int],
+		timeout: float | None = None,
+	) -> None:
+		stub = self.get_stub(
+			passenger_host, passenger_port, rollercoaster_pb2_grpc.passengerStub
+		)
+		print(f'{len(passenger_ids)} passengers disembark')
+		stub.i_am_disembarking_bulk(
+			rollercoaster_pb2.PassengerBatch(passenger_id=passenger_ids),
+			timeout=timeout,
+		)
 
 	def call_passenger_disembarking(
-		self, passenger_host: str, passenger_port: int
+		self,
+		passenger_host: str,
+		passenger_port: int,
+		passenger_id: int,
+		timeout: float | None = None,
 	) -> None:
-		channel = self.create_channel(passenger_host, passenger_port)
-		stub = rollercoaster_pb2_grpc.passengerStub(channel)
+		if self._publish(
+			(passenger_host, passenger_port),
+			rollercoaster_pb2.Event.DISEMBARKING,
+			[passenger_id],
+		):
+			return
+		stub = self.get_stub(
+			passenger_host, passenger_port, rollercoaster_pb2_grpc.passengerStub
+		)
 		print('passenger disembark')
-		stub.i_am_disembarking(empty_pb2.Empty())
-		channel.close()
+		stub.i_am_disembarking(
+			rollercoaster_pb2.PassengerNotice(passenger_id=passenger_id),
+			timeout=timeout,
+		)
 
 	def get_wagons(self) -> dict[int, tuple[str, int]]:
 		return self._wagons.copy()
@@ -135,62 +886,242 @@ class RollercoasterService(BaseService, rollercoaster_pb2_grpc.rollercoasterServ
 		return self._waiting_passengers.copy()
 
 	def remove_waiting_passengers(self, passenger_ids: list[int]) -> None:
-		for pid in passenger_ids:
-			if pid in self._waiting_passengers:
-				self._waiting_passengers.remove(pid)
+		with self._lock:
+			for pid in passenger_ids:
+				self._waiting_passengers.discard(pid)
+			self._log(journal.DISCARD, journal.encode_ids(-1, passenger_ids))
+			self._status_changed()
 
 	def _start_ride_coordinator(self) -> None:
 		self._running = True
+		self._dispatcher = futures.ThreadPoolExecutor(
+			max_workers=self.dispatch_workers, thread_name_prefix='ride-dispatch'
+		)
 		self._ride_thread = threading.Thread(target=self._ride_coordinator, daemon=True)
 		self._ride_thread.start()
+		self._flusher.start()
+
+	def _call_later(self, delay: float, callback: Callable[[], object]) -> None:
+		self._flusher.call_later(delay, callback)
+
+	def _wake_coordinator(self) -> None:
+		# Called with self._lock held whenever a ride may have become possible
+		self._ride_ready.notify()
+
+	def _capacity(self, wagon_id: int) -> int:
+		return self._wagon_capacity.get(wagon_id) or self.wagon_cap
+
+	def _can_dispatch(self) -> bool:
+		# Wagons leave in registration order, so only the next one matters
+		while self._waiting_wagons and self._waiting_wagons[0] not in self._wagons:
+			self._waiting_wagons.popleft()
+		if not self._waiting_wagons:
+			return False
+		return len(self._waiting_passengers) >= self._capacity(self._waiting_wagons[0])
+
+	def _take_ride(self) -> Ride:
+		wagon_id = self._waiting_wagons.popleft()
+		passengers_for_ride = self._waiting_passengers.pop_front(
+			self._capacity(wagon_id)
+		)
+		self._apply_ride(wagon_id, passengers_for_ride)
+		self._boarding_rate.mark(len(passengers_for_ride))
+		self._log(journal.RIDE, journal.encode_ids(wagon_id, passengers_for_ride))
+		self._rides_dispatched.inc()
+		print(f'Starting ride: wagon {wagon_id} with passengers {passengers_for_ride}')
+		now = self.clock.now()
+		return Ride(
+			wagon_id,
+			self._wagons[wagon_id],
+			{pid: self._passengers[pid] for pid in passengers_for_ride},
+			{pid: self._waiting_since.pop(pid, now) for pid in passengers_for_ride},
+			now,
+		)
+
+	def _take_rides(self) -> tuple[list[Ride], dict[int, tuple[str, int]]]:
+		# Caller holds self._lock. Expired entries go first so they are never
+		# picked; the passengers this releases still need to disembark.
+		released = self._reap_expired()
+		if self._recovered:
+			released |= self._recovered
+			self._recovered = {}
+		rides = []
+		while self._can_dispatch():
+			rides.append(self._take_ride())
+		self._status_changed()
+		return rides, released
+
+	def _apply_ride(self, wagon_id: int, passenger_ids: list[int]) -> None:
+		# Caller holds self._lock
+		self._wagon_order.append(wagon_id)
+		self._riding.setdefault(wagon_id, deque()).append(passenger_ids)
+
+	def _ride_boarded(self, ride: Ride) -> None:
+		now = self.clock.now()
+		self._boarding.observe(now - ride.dispatched_at)
+		for since in ride.waiting_since.values():
+			self._passenger_wait.observe(now - since)
+
+	def _ride_departed(self, ride: Ride) -> None:
+		with self._lock:
+			departed = self._departed_at.setdefault(ride.wagon_id, deque())
+			# An arrival can beat this if the wagon is quick; don't let its
+			# timestamp linger for the next ride
+			if len(departed) < len(self._riding.get(ride.wagon_id, ())):
+				departed.append(self.clock.now())
+			elif not departed:
+				del self._departed_at[ride.wagon_id]
 
 	def _ride_coordinator(self) -> None:
 		print('started coordinating')
 		while self._running:
 			try:
-				with self._lock:
-					if (
-						len(self._waiting_wagons) >= 1
-						and len(self._waiting_passengers) >= self.wagon_cap
-					):
-						wagon_id = self._waiting_wagons.popleft()
-						wagon_host, wagon_port = self._wagons[wagon_id]
-
-						passengers_for_ride = self._waiting_passengers[: self.wagon_cap]
-						self.remove_waiting_passengers(passengers_for_ride)
-
-						print(
-							f'Starting ride: wagon {wagon_id} with passengers {passengers_for_ride}'
-						)
-						self._wagon_order.append(wagon_id)
-
-						self._coordinate_ride(
-							wagon_host, wagon_port, passengers_for_ride
-						)
-
-				time.sleep(1)  # Check every second for new rides
+				with self._ride_ready:
+					# Sleep until a registration or arrival makes a ride
+					# possible, a recovery left passengers to send home, or
+					# at least once a lease to reap expired ones
+					self._ride_ready.wait_for(
+						lambda: (
+							not self._running
+							or self._can_dispatch()
+							or bool(self._recovered)
+						),
+						timeout=self.lease_duration or None,
+					)
+					if not self._running:
+						break
+					# Send off every wagon the waiting passengers can fill
+					rides, released = self._take_rides()
+
+				# Talking to the passengers and the wagons happens outside the lock
+				self.disembark_passengers(released)
+				assert self._dispatcher is not None
+				for ride in rides:
+					self._dispatcher.submit(self._coordinate_ride, ride)
 			except Exception as e:
 				print(f'Ride coordinator error: {e}')
 
-	def _coordinate_ride(
-		self, wagon_host: str, wagon_port: int, passenger_ids: list[int]
-	) -> None:
+	def _coordinate_ride(self, ride: Ride) -> None:
 		try:
-			for pid in passenger_ids:
-				if pid in self._passengers:
-					p_host, p_port = self._passengers[pid]
-					self.call_passenger_boarding(p_host, p_port)
-
-			self.call_wagon_depart(wagon_host, wagon_port, passenger_ids)
+			self.board_passengers(ride.passengers)
+		except BoardingError as e:
+			print(f'Ride coordination error: {len(e.failed)} passengers unreachable')
+			boarded = [pid for pid in ride.passengers if pid not in e.failed]
+			self.disembark_passengers(
+				self._requeue_ride(ride, boarded, requeue_wagon=True)
+			)
+			return
+		self._ride_boarded(ride)
 
+		try:
+			self.call_wagon_depart(*ride.wagon, list(ride.passengers), ride.wagon_id)
 		except Exception as e:
 			print(f'Ride coordination error: {e}')
-			# Return passengers to waiting queue on error
-			with self._lock:
-				self._waiting_passengers.extend(passenger_ids)
+			self.disembark_passengers(
+				self._requeue_ride(ride, list(ride.passengers), requeue_wagon=False)
+			)
+			return
+		self._ride_departed(ride)
+
+	def _requeue_ride(
+		self, ride: Ride, passenger_ids: list[int], requeue_wagon: bool
+	) -> dict[int, tuple[str, int]]:
+		# Passengers that were reachable keep their place at the front of the
+		# queue; unreachable ones are dropped until they register again
+		with self._lock:
+			self._apply_requeue(ride.wagon_id, passenger_ids, requeue_wagon)
+			if not requeue_wagon:
+				# Its depart failed; whether or not it got through, the wagon
+				# has to register again before it can take another ride
+				self._stranded.add(ride.wagon_id)
+			self._log(
+				journal.REQUEUE_WAGON if requeue_wagon else journal.REQUEUE,
+				journal.encode_ids(ride.wagon_id, passenger_ids),
+			)
+			self._waiting_since.update(
+				(pid, ride.waiting_since[pid])
+				for pid in passenger_ids
+				if pid in ride.waiting_since
+			)
+			self._rides_failed.inc()
+			self._wake_coordinator()
+			# Arrivals that were only waiting for this ride can go now
+			released = self._release_arrivals()
+			self._status_changed()
+			return released
+
+	def _apply_requeue(
+		self, wagon_id: int, passenger_ids: list[int], requeue_wagon: bool
+	) -> None:
+		# Caller holds self._lock. The failed ride is the wagon's latest; an
+		# earlier one of it may still be waiting in line for its arrival. If
+		# the wagon reported it anyway, its place in line is the arrival's.
+		rides = self._riding.get(wagon_id)
+		if rides:
+			self._drop_latest_ride(wagon_id)
+			rides.pop()
+			if not rides:
+				del self._riding[wagon_id]
+		if requeue_wagon:
+			self._waiting_wagons.appendleft(wagon_id)
+		self._waiting_passengers.push_front(passenger_ids)
+
+	def _drop_latest_ride(self, wagon_id: int) -> None:
+		# Caller holds self._lock
+		for position in range(len(self._wagon_order) - 1, -1, -1):
+			if self._wagon_order[position] == wagon_id:
+				del self._wagon_order[position]
+				return
+
+	def _close_journal(self) -> None:
+		# A final snapshot means the next start has no log to replay
+		if self.journal is not None:
+			self.write_snapshot()
+			self.journal.close()
+			self.journal = None
 
 	def stop_server(self) -> None:
-		self._running = False
+		with self._ride_ready:
+			self._running = False
+			self._ride_ready.notify_all()
 		if self._ride_thread:
 			self._ride_thread.join(timeout=1)
+		self._flusher.stop()
+		if self._dispatcher:
+			self._dispatcher.shutdown(wait=False, cancel_futures=True)
+			self._dispatcher = None
+		with self._lock:
+			subscribers = list(self._subscribers.values())
+		for publish in subscribers:
+			publish(None)
+		self._status.close()
+		if self._stop_metrics is not None:
+			self._stop_metrics()
 		super().stop_server()
+		self._close_journal()
+		self.notifier.shutdown()
+		print(f'channel pool: {self.channels.stats()}')
+		print(f'notifications: {self.notifier.stats()}')
+		self.channels.close()
+
+
+def _by_endpoint(passengers: dict[int, Endpoint]) -> dict[Endpoint, list[int]]:
+	by_endpoint: dict[Endpoint, list[int]] = {}
+	for pid, endpoint in passengers.items():
+		by_endpoint.setdefault(endpoint, []).append(pid)
+	return by_endpoint
+
+
+def _status_update(
+	status: Status, previous: Status | None
+) -> rollercoaster_pb2.StatusUpdate:
+	return rollercoaster_pb2.StatusUpdate(
+		version=status.version, **status.changes(previous)
+	)
+
+
+def _histogram_message(histogram: Histogram) -> rollercoaster_pb2.Histogram:
+	counts, total, count = histogram.snapshot()
+	return rollercoaster_pb2.Histogram(
+		bounds=histogram.bounds, counts=counts, sum=total, count=count
+	)
@@ -0,0 +1,35 @@
+import heapq
+import itertools
+import threading
+from collections.abc import Iterator
+
+
+class DueQueue[T]:
+	# Work that becomes due at some point, e.g. a ride ending or a
+	# registration retry, for services hosting many wagons or passengers.
+	# One periodic tick takes out everything that is due, in place of a
+	# timer per item.
+	def __init__(self) -> None:
+		self._heap: list[tuple[float, int, T]] = []
+		# Keeps items due at the same time in FIFO order
+		self._sequence = itertools.count()
+		self._lock = threading.Lock()
+
+	def push(self, when: float, item: T) -> None:
+		with self._lock:
+			heapq.heappush(self._heap, (when, next(self._sequence), item))
+
+	def pop_due(self, now: float) -> list[T]:
+		due = []
+		with self._lock:
+			while self._heap and self._heap[0][0] <= now:
+				due.append(heapq.heappop(self._heap)[2])
+		return due
+
+	def __iter__(self) -> Iterator[T]:
+		with self._lock:
+			items = [item for _, _, item in self._heap]
+		return iter(items)
+
+	def __len__(self) -> int:
+		return len(self._heap)
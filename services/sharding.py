@@ -0,0 +1,47 @@
+import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+	# Stable across processes, unlike hash()
+	return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+def parse_shard_map(text: str) -> list[tuple[str, int]]:
+	# "host:port,host:port,..."
+	shards = []
+	for entry in text.split(','):
+		host, _, port = entry.strip().rpartition(':')
+		shards.append((host or 'localhost', int(port)))
+	return shards
+
+
+class HashRing:
+	# Each shard is placed at many points on the ring so keys spread evenly,
+	# and adding or removing a shard only moves the keys next to its points
+	def __init__(self, shards: list[tuple[str, int]], replicas: int = 64) -> None:
+		if not shards:
+			raise ValueError('a shard map needs at least one shard')
+		self.shards = list(shards)
+		points = sorted(
+			(_hash(f'{host}:{port}#{replica}'), index)
+			for index, (host, port) in enumerate(self.shards)
+			for replica in range(replicas)
+		)
+		self._hashes = [point for point, _ in points]
+		self._owners = [index for _, index in points]
+
+	def shard_for(self, host: str, port: int, skip: int = 0) -> tuple[str, int]:
+		# skip passes over that many shards clockwise from the owner, for
+		# when the ones before are no use
+		position = bisect.bisect(self._hashes, _hash(f'{host}:{port}'))
+		skip %= len(self.shards)
+		passed: set[int] = set()
+		for offset in range(len(self._owners)):
+			owner = self._owners[(position + offset) % len(self._owners)]
+			if owner in passed:
+				continue
+			if len(passed) == skip:
+				return self.shards[owner]
+			passed.add(owner)
+		raise AssertionError('every shard is on the ring')
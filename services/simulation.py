@@ -0,0 +1,145 @@
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from proto import rollercoaster_pb2
+from services.channel_pool import ChannelPool
+from services.clock import VirtualClock
+from services.consumer_service import ConsumerService
+from services.passenger_service import PassengerService
+from services.rollercoaster_service import RollercoasterService
+from services.wagon_service import WagonService
+
+
+class LocalChannel:
+	# Stands in for a grpc channel and calls the servicer's handlers directly,
+	# so the generated stubs work unchanged inside one process
+	def __init__(self, servicer: object) -> None:
+		self.servicer = servicer
+
+	def unary_unary(self, method: str, *args, **kwargs) -> Callable[..., Any]:
+		handler = getattr(self.servicer, method.rsplit('/', 1)[1])
+		return lambda request, *args, **kwargs: handler(request, None)
+
+	unary_stream = unary_unary
+
+	def close(self) -> None:
+		pass
+
+
+class SimulatedRollercoasterService(RollercoasterService):
+	# The real coordinator, minus its threads: rides are dispatched from a
+	# clock callback and every consumer is reached through its subscription
+	def __init__(self, clock: VirtualClock) -> None:
+		super().__init__('sim', 0)
+		self.clock = clock
+		self._dispatch_scheduled = False
+
+	def _wake_coordinator(self) -> None:
+		if not self._dispatch_scheduled:
+			self._dispatch_scheduled = True
+			self.clock.call_later(0.0, self._dispatch)
+
+	def _call_later(self, delay: float, callback: Callable[[], object]) -> None:
+		self.clock.call_later(delay, callback)
+
+	def _dispatch(self) -> None:
+		with self._lock:
+			self._dispatch_scheduled = False
+			rides, released = self._take_rides()
+		self.disembark_passengers(released)
+		for ride in rides:
+			self._coordinate_ride(ride)
+
+	def disembark_passengers(self, passengers: dict[int, tuple[str, int]]) -> None:
+		for pid, (host, port) in passengers.items():
+			self.call_passenger_disembarking(host, port, pid)
+
+
+@dataclass(slots=True)
+class SimulationReport:
+	seed: int
+	simulated_seconds: float
+	wall_seconds: float
+	events: int
+	rides: int
+	rides_per_hour: float
+	passenger_wait_p50: float
+	passenger_wait_p99: float
+	rejections: int
+	ride_cycle_p50: float
+
+
+class Simulation:
+	def __init__(
+		self,
+		passengers: int = 100,
+		wagons: int = 10,
+		capacity: int = 2,
+		seed: int = 0,
+		ride_duration: float = 5.0,
+		retry_delay: tuple[float, float] = (0.1, 0.5),
+		latency: float = 0.001,
+		max_waiting: int | None = None,
+	) -> None:
+		self.seed = seed
+		self.latency = latency
+		self.clock = VirtualClock()
+		self.rng = random.Random(seed)
+		self.coordinator = SimulatedRollercoasterService(self.clock)
+		self.coordinator.max_waiting_passengers = max_waiting
+		self.consumers: list[ConsumerService] = []
+		for port in range(1, wagons + 1):
+			wagon = WagonService('wagon', port, capacity=capacity)
+			wagon.ride_duration = ride_duration
+			self._add(wagon, retry_delay)
+		for port in range(1, passengers + 1):
+			self._add(PassengerService('passenger', port), retry_delay)
+
+	def _add(self, consumer: ConsumerService, retry_delay: tuple[float, float]) -> None:
+		consumer.clock = self.clock
+		# Each consumer draws from its own stream, derived from the seed
+		consumer.rng = random.Random(self.rng.getrandbits(64))
+		consumer.retry_delay = retry_delay
+		consumer.channels = ChannelPool(
+			channel_factory=lambda target, options: LocalChannel(self.coordinator)
+		)
+		self.coordinator._subscribe(
+			(consumer.host, consumer.port),
+			lambda event: self._deliver(consumer, event),
+		)
+		self.consumers.append(consumer)
+
+	def _deliver(
+		self, consumer: ConsumerService, event: rollercoaster_pb2.Event | None
+	) -> None:
+		if event is not None:
+			self.clock.call_later(self.latency, lambda: consumer._handle_event(event))
+
+	def run(self, duration: float) -> SimulationReport:
+		start = time.perf_counter()
+		for consumer in self.consumers:
+			# Spread the first registrations out like the retries that follow
+			self.clock.call_later(
+				self.rng.uniform(0.0, consumer.retry_delay[1]),
+				consumer.register_with_rollercoaster,
+			)
+		events = self.clock.run(until=self.clock.now() + duration)
+		wall = time.perf_counter() - start
+
+		coordinator = self.coordinator
+		rides = coordinator._rides_completed.value
+		return SimulationReport(
+			seed=self.seed,
+			simulated_seconds=duration,
+			wall_seconds=round(wall, 3),
+			events=events,
+			rides=rides,
+			rides_per_hour=round(rides * 3600 / duration, 1),
+			passenger_wait_p50=coordinator._passenger_wait.quantile(0.5),
+			passenger_wait_p99=coordinator._passenger_wait.quantile(0.99),
+			rejections=coordinator._rejections.value,
+			ride_cycle_p50=coordinator._ride_cycle.quantile(0.5),
+		)
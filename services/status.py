@@ -0,0 +1,86 @@
+import dataclasses
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Self
+
+type Listener = Callable[[], object]
+
+
+@dataclass(frozen=True, slots=True)
+class Status:
+	# The coordinator's counts at one version; never changed once published
+	version: int = 0
+	total_wagons: int = 0
+	total_passengers: int = 0
+	waiting_passengers: int = 0
+	waiting_wagons: int = 0
+	rides_in_flight: int = 0
+	rides_total: int = 0
+
+	def changes(self, previous: Self | None) -> dict[str, int]:
+		# The counts that differ from previous, or all of them without one
+		changes = {}
+		for field in dataclasses.fields(self)[1:]:
+			value = getattr(self, field.name)
+			if previous is None or value != getattr(previous, field.name):
+				changes[field.name] = value
+		return changes
+
+
+class StatusBoard:
+	# Holds the latest Status, which is swapped for a new one whenever the
+	# counts change. Readers just take current, without a lock, and watchers
+	# are told that something changed rather than what, so the writer does
+	# the same small amount of work however many there are.
+	def __init__(self) -> None:
+		self.current = Status()
+		self.closed = False
+		self._counts: tuple[int, ...] = ()
+		# Replaced rather than changed, so publish can go through it unlocked
+		self._listeners: tuple[Listener, ...] = ()
+		self._lock = threading.Lock()
+
+	def publish(
+		self,
+		total_wagons: int,
+		total_passengers: int,
+		waiting_passengers: int,
+		waiting_wagons: int,
+		rides_in_flight: int,
+		rides_total: int,
+	) -> None:
+		# Called by one writer at a time, the coordinator holding its lock
+		counts = (
+			total_wagons,
+			total_passengers,
+			waiting_passengers,
+			waiting_wagons,
+			rides_in_flight,
+			rides_total,
+		)
+		if counts == self._counts:
+			return
+		self._counts = counts
+		self.current = Status(self.current.version + 1, *counts)
+		for listener in self._listeners:
+			listener()
+
+	def watch(self, listener: Listener) -> Callable[[], None]:
+		# listener is called after every change and on close, from the
+		# writer's thread; returns a function that stops the calls
+		with self._lock:
+			self._listeners = (*self._listeners, listener)
+
+		def unwatch() -> None:
+			with self._lock:
+				self._listeners = tuple(
+					other for other in self._listeners if other is not listener
+				)
+
+		return unwatch
+
+	def close(self) -> None:
+		self.closed = True
+		for listener in self._listeners:
+			listener()
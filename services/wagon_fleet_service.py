@@ -0,0 +1,151 @@
+import grpc
+from google.protobuf import empty_pb2
+
+from proto import rollercoaster_pb2, rollercoaster_pb2_grpc
+from services.bulk_consumer_service import BATCH_SIZE, BulkConsumerService
+from services.wagon_service import WagonService
+
+# What a due item is for
+ARRIVE = 0
+REGISTER = 1
+
+
+class WagonFleetService(
+	BulkConsumerService[tuple[int, int, int]], rollercoaster_pb2_grpc.wagonServicer
+):
+	# Hosts a fleet of wagons behind one server and port. Ride ends and
+	# registration retries all go through the DueQueue, as (ARRIVE or
+	# REGISTER, slot, attempt), and each tick reports every ride that ended
+	# in one arrive_bulk call, so no thread is parked per wagon.
+	noun = 'wagons'
+	wagon = True
+
+	def __init__(
+		self,
+		host: str,
+		port: int,
+		rollercoaster_host: str = 'localhost',
+		rollercoaster_port: int = 50051,
+		subscribe: bool = False,
+		capacity: int = 0,
+		wagons: int = 100,
+	) -> None:
+		super().__init__(
+			host, port, rollercoaster_host, rollercoaster_port, subscribe, wagons
+		)
+		self.capacity = capacity
+		self.ride_duration = 5.0
+		# Passenger IDs aboard each wagon out on a ride
+		self._riding: dict[int, list[int]] = {}
+
+	def _configure_server(self, server: grpc.Server) -> None:
+		rollercoaster_pb2_grpc.add_wagonServicer_to_server(self, server)
+
+	def _idle_slots(self) -> list[int]:
+		# Neither riding nor waiting to retry
+		due = {slot for _, slot, _ in self._due}
+		with self._lock:
+			return [
+				slot
+				for slot in range(self.size)
+				if slot not in self._riding and slot not in due
+			]
+
+	def _registration_request(self) -> rollercoaster_pb2.RegistrationRequest:
+		request = super()._registration_request()
+		request.capacity = self.capacity
+		return request
+
+	def _send_registrations(
+		self,
+		stub: rollercoaster_pb2_grpc.rollercoasterStub,
+		batch: rollercoaster_pb2.RegistrationBatch,
+	) -> rollercoaster_pb2.RegistrationBatchResponse:
+		return stub.register_wagons_bulk(batch, timeout=self.rpc_timeout)
+
+	def _registration_due(self, slot: int) -> tuple[int, int, int]:
+		return REGISTER, slot, 0
+
+	def depart(self, request, context) -> empty_pb2.Empty:
+		self._depart(request.wagon_id, list(request.passenger_id))
+		return empty_pb2.Empty()
+
+	def _depart(self, wagon_id: int, passenger_ids: list[int]) -> None:
+		with self._lock:
+			slot = self._slots.get(wagon_id)
+			if slot is None:
+				print(f'Wagon {wagon_id} is not part of this fleet')
+				return
+			self._riding[slot] = passenger_ids
+		self._due.push(self.clock.now() + self.ride_duration, (ARRIVE, slot, 0))
+
+	def _handle_event(self, event: rollercoaster_pb2.Event) -> None:
+		if event.kind == rollercoaster_pb2.Event.DEPARTING:
+			self._depart(event.wagon_id, list(event.passenger_id))
+
+	def _tick(self) -> None:
+		arrivals, registrations = [], []
+		for kind, slot, attempt in self._due.pop_due(self.clock.now()):
+			if kind == ARRIVE:
+				arrivals.append((slot, attempt))
+			else:
+				registrations.append(slot)
+		if arrivals:
+			self._report_arrivals(arrivals)
+		if registrations:
+			self._register(registrations)
+
+	def _report_arrivals(self, arrivals: list[tuple[int, int]]) -> None:
+		with self._lock:
+			# A wagon whose lease ran out mid-ride has nothing left to report
+			arrivals = [
+				(slot, attempt) for slot, attempt in arrivals if slot in self._riding
+			]
+			requests = [
+				rollercoaster_pb2.arrive_request(
+					wagon_id=self.ids[slot], passenger_id=self._riding[slot]
+				)
+				for slot, _ in arrivals
+			]
+		if not arrivals:
+			return
+		print(f'{len(arrivals)} rides completed, notifying rollercoaster')
+		stub = self._rollercoaster_stub()
+		failed = []
+		for start in range(0, len(arrivals), BATCH_SIZE):
+			batch = arrivals[start : start + BATCH_SIZE]
+			try:
+				response = stub.arrive_bulk(
+					rollercoaster_pb2.ArrivalBatch(
+						arrivals=requests[start : start + BATCH_SIZE]
+					),
+					timeout=self.rpc_timeout,
+				)
+				acks = [ack.success for ack in response.arrivals]
+			except grpc.RpcError as e:
+				print(f'Failed to notify rollercoaster of {len(batch)} arrivals: {e}')
+				acks = [False] * len(batch)
+			arrived = []
+			with self._lock:
+				for (slot, attempt), success in zip(batch, acks, strict=True):
+					if success:
+						self._riding.pop(slot, None)
+						self.rides += 1
+						arrived.append(slot)
+					else:
+						failed.append((slot, attempt))
+			self._register_later(arrived)
+
+		now = self.clock.now()
+		for slot, attempt in failed:
+			delay = WagonService.arrival_backoff(attempt)
+			self._due.push(now + delay, (ARRIVE, slot, attempt + 1))
+		if failed:
+			print(f'retrying {len(failed)} arrivals')
+
+	def _forget(self, slot: int) -> None:
+		# The coordinator has already sent its passengers home
+		self._riding.pop(slot, None)
+
+	def _busy(self) -> dict[str, int]:
+		return {'riding': len(self._riding)}
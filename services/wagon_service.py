@@ -1,6 +1,3 @@
-import threading
-import time
-
 import grpc
 from google.protobuf import empty_pb2
 
@@ -15,23 +12,32 @@ class WagonService(ConsumerService, rollercoaster_pb2_grpc.wagonServicer):
 		port: int,
 		rollercoaster_host: str = 'localhost',
 		rollercoaster_port: int = 50051,
+		subscribe: bool = False,
+		capacity: int = 0,
 	) -> None:
-		super().__init__(host, port)
-		self.rollercoaster_host = rollercoaster_host
-		self.rollercoaster_port = rollercoaster_port
+		super().__init__(host, port, rollercoaster_host, rollercoaster_port, subscribe)
+		self.capacity = capacity
 		self.wagon_id: int | None = None
 		self.current_passengers: list[int] = []
+		self.ride_duration = 5.0
 
 	def _configure_server(self, server: grpc.Server) -> None:
 		rollercoaster_pb2_grpc.add_wagonServicer_to_server(self, server)
 
 	def register_with_rollercoaster(self) -> bool:
-		channel = self.create_channel(self.rollercoaster_host, self.rollercoaster_port)
-		stub = rollercoaster_pb2_grpc.rollercoasterStub(channel)
-		request = rollercoaster_pb2.RegistrationRequest(host=self.host, port=self.port)
-		response = stub.register_wagon(request)
-		channel.close()
+		stub = self._rollercoaster_stub()
+		request = self._registration_request()
+		return self._handle_registration(stub.register_wagon(request))
+
+	def _registration_request(self) -> rollercoaster_pb2.RegistrationRequest:
+		request = super()._registration_request()
+		request.capacity = self.capacity
+		return request
 
+	def _handle_registration(
+		self, response: rollercoaster_pb2.RegistrationResponse
+	) -> bool:
+		self._start_heartbeat(response.lease_ms)
 		if response.success:
 			self.wagon_id = response.id
 			print(f'Wagon registered successfully with ID {response.id}')
@@ -39,32 +45,44 @@ class WagonService(ConsumerService, rollercoaster_pb2_grpc.wagonServicer):
 		print('Wagon registration failed')
 		return False
 
+	def _heartbeat_request(self) -> rollercoaster_pb2.HeartbeatRequest | None:
+		if self.wagon_id is None:
+			return None
+		return rollercoaster_pb2.HeartbeatRequest(id=self.wagon_id, wagon=True)
+
 	def depart(self, request, context) -> empty_pb2.Empty:
-		self.current_passengers = list(request.passenger_id)
-		threading.Thread(
-			target=self._notify_arrival,
-			daemon=True
-		).start()
+		self._depart(list(request.passenger_id))
 		return empty_pb2.Empty()
 
-	def _notify_arrival(self) -> None:
-		time.sleep(5)
+	def _depart(self, passenger_ids: list[int]) -> None:
+		self.current_passengers = passenger_ids
+		self._call_later(self.ride_duration, self._report_arrival)
+
+	def _handle_event(self, event: rollercoaster_pb2.Event) -> None:
+		if event.kind == rollercoaster_pb2.Event.DEPARTING:
+			self._depart(list(event.passenger_id))
+
+	def _report_arrival(self, attempt: int = 0) -> None:
 		if self.wagon_id is None:
 			return
 
-		channel = self.create_channel(self.rollercoaster_host, self.rollercoaster_port)
 		try:
 			print(f'Wagon {self.wagon_id} ride completed, notifying rollercoaster')
-			stub = rollercoaster_pb2_grpc.rollercoasterStub(channel)
+			stub = self._rollercoaster_stub()
 			arrive_request = rollercoaster_pb2.arrive_request(
 				wagon_id=self.wagon_id, passenger_id=self.current_passengers
 			)
-			res = rollercoaster_pb2.StatusResponse = stub.arrive(arrive_request)
-			if (res.success):
+			if stub.arrive(arrive_request).success:
 				self.current_passengers = []
 				self.delayed_retry()
-			channel.close()
-			if (not res.success):
-				self._notify_arrival()
-		except Exception as e:
+				return
+		except grpc.RpcError as e:
 			print(f'Failed to notify rollercoaster of arrival: {e}')
+
+		delay = self.arrival_backoff(attempt)
+		print(f'retrying arrival in {delay:.1f} seconds...')
+		self._call_later(delay, lambda: self._report_arrival(attempt + 1))
+
+	@staticmethod
+	def arrival_backoff(attempt: int) -> float:
+		return min(0.5 * 2**attempt, 30.0)
@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+
+
+class WaitingQueue:
+	# Insertion-ordered set: every operation below is O(1) per item
+	def __init__(self) -> None:
+		self._items: OrderedDict[int, None] = OrderedDict()
+
+	def push(self, item: int) -> bool:
+		if item in self._items:
+			return False
+		self._items[item] = None
+		return True
+
+	def push_front(self, items: Iterable[int]) -> None:
+		for item in reversed(list(items)):
+			self._items[item] = None
+			self._items.move_to_end(item, last=False)
+
+	def pop_front(self, count: int) -> list[int]:
+		return [self._items.popitem(last=False)[0] for _ in range(count)]
+
+	def discard(self, item: int) -> None:
+		self._items.pop(item, None)
+
+	def copy(self) -> list[int]:
+		return list(self._items)
+
+	def __contains__(self, item: object) -> bool:
+		return item in self._items
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+	def __iter__(self) -> Iterator[int]:
+		return iter(self._items)
@@ -0,0 +1,60 @@
+import argparse
+import contextlib
+import dataclasses
+import json
+import os
+
+from services.simulation import Simulation
+
+
+def parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(
+		description='Run the coordinator against simulated wagons and passengers '
+		'on a virtual clock'
+	)
+	parser.add_argument('--passengers', type=int, default=100)
+	parser.add_argument('--wagons', type=int, default=10)
+	parser.add_argument('--capacity', type=int, default=2)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument(
+		'--duration', type=float, default=3600.0, help='simulated seconds'
+	)
+	parser.add_argument('--ride-duration', type=float, default=5.0)
+	parser.add_argument('--retry-delay', type=float, nargs=2, default=(0.1, 0.5))
+	parser.add_argument(
+		'--max-waiting',
+		type=int,
+		help='bound on waiting passengers, default all of them; lower turns '
+		'the rest away to retry',
+	)
+	parser.add_argument(
+		'--verbose', action='store_true', help="show the services' own output"
+	)
+	return parser.parse_args()
+
+
+def main() -> None:
+	args = parse_args()
+	if args.max_waiting is None:
+		# A fixed crowd is better queued than sent off to poll a full queue,
+		# which costs events without adding rides
+		args.max_waiting = args.passengers
+	with contextlib.ExitStack() as stack:
+		if not args.verbose:
+			devnull = stack.enter_context(open(os.devnull, 'w'))
+			stack.enter_context(contextlib.redirect_stdout(devnull))
+		simulation = Simulation(
+			args.passengers,
+			args.wagons,
+			args.capacity,
+			args.seed,
+			args.ride_duration,
+			tuple(args.retry_delay),
+			max_waiting=args.max_waiting,
+		)
+		report = simulation.run(args.duration)
+	print(json.dumps(dataclasses.asdict(report), indent=2))
+
+
+if __name__ == '__main__':
+	main()